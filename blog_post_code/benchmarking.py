@@ -0,0 +1,47 @@
+"""
+The command line plumbing shared by the benchmark modules of the packages.
+
+Each benchmark module builds its parser with benchmark_parser, adds its own
+options and hands the results of its run_benchmarks to write_results, which
+writes one JSON object per result along with the environment it ran in.
+"""
+
+import argparse
+import json
+import platform
+import sys
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, TextIO
+
+import numpy as np
+
+from blog_post_code import __version__
+
+
+def environment(**libraries: str) -> Dict[str, str]:
+    """
+    Describe the interpreter and libraries the benchmarks ran with, adding
+    the versions of any further libraries given by name.
+    """
+    return {
+        "blog_post_code": __version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        **libraries,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    }
+
+
+def benchmark_parser(doc: str) -> argparse.ArgumentParser:
+    """A parser described by the first paragraph of doc, with an --output option."""
+    parser = argparse.ArgumentParser(description=doc.split("\n\n")[0].strip())
+    parser.add_argument("--output", type=argparse.FileType("w"), default=sys.stdout)
+    return parser
+
+
+def write_results(results: Iterable[Any], output: TextIO, env: Dict[str, str]) -> None:
+    """Write each dataclass result as a line of JSON as soon as it completes."""
+    for result in results:
+        output.write(json.dumps({**asdict(result), "environment": env}) + "\n")
+        output.flush()
@@ -0,0 +1,65 @@
+"""
+Helpers shared by the on-disk caches of the packages.
+
+Cache entries are named by a hash of their inputs and a version number, so
+bumping the version a cache passes in invalidates all of its old entries.
+Entries are written under a temporary name beside the final one and renamed
+into place, so a half-written entry is never read.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Union
+
+_FILE_CHUNK_SIZE = 1 << 20
+
+
+def content_key(version: int, *parts: Union[str, bytes, os.PathLike]) -> str:
+    """
+    The sha256 hex digest of a cache version and parts, each either a str,
+    bytes or a path (any PathLike) whose file contents are hashed.
+    """
+    digest = hashlib.sha256(f"{version}\0".encode())
+    for part in parts:
+        if isinstance(part, os.PathLike):
+            with open(part, "rb") as file:
+                for chunk in iter(lambda: file.read(_FILE_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        elif isinstance(part, str):
+            digest.update(part.encode("utf-8", "surrogatepass"))
+        else:
+            digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def write_entry(
+    entry: Path, write: Callable[[Path], None], directory: bool = False
+) -> None:
+    """
+    Create the cache entry at entry atomically: write is called with a
+    temporary path beside it (an empty directory if directory, otherwise a
+    file name) which is then renamed to entry. A directory entry that another
+    process created first is kept rather than replaced.
+    """
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    if directory:
+        staging = Path(tempfile.mkdtemp(dir=entry.parent))
+    else:
+        descriptor, name = tempfile.mkstemp(dir=entry.parent, suffix=entry.suffix)
+        os.close(descriptor)
+        staging = Path(name)
+
+    try:
+        write(staging)
+        os.replace(staging, entry)
+    except BaseException as error:
+        if directory:
+            shutil.rmtree(staging, ignore_errors=True)
+        else:
+            staging.unlink(missing_ok=True)
+        if not (isinstance(error, OSError) and directory and entry.is_dir()):
+            raise
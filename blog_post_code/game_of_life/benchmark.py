@@ -0,0 +1,275 @@
+"""
+Benchmark the Game of Life neighbour counting and stepping backends.
+
+Every combination of grid size, density, dtype and backend is timed over a
+fixed number of generations (best of several repeats) and traced with
+tracemalloc, and one JSON object per combination is written out so results
+can be compared between releases:
+
+    python -m blog_post_code.game_of_life.benchmark --sizes 10 100 1000 \
+        --output results.jsonl
+
+Reported metrics are cells_per_second, peak_bytes (the tracemalloc high-water
+mark over a whole run above the memory held beforehand),
+peak_bytes_per_generation (the largest transient allocation made while
+stepping a single generation) and allocations_per_generation (memory blocks
+made by the stepping and still held at the end of the run, per generation,
+as with allocations_per_token in the lexer benchmark). Combinations whose
+estimated footprint exceeds --max-memory are reported as skipped rather than
+run.
+"""
+
+import itertools as it
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from numpy.random import default_rng
+from numpy.typing import NDArray
+
+from blog_post_code.benchmarking import benchmark_parser, environment, write_results
+from blog_post_code.game_of_life.bitpacked import pack_grid, step_packed
+from blog_post_code.game_of_life.conway import (
+    count_neighbors,
+    count_neighbors_np,
+    simulate,
+)
+from blog_post_code.game_of_life.hashlife import HashLife
+from blog_post_code.game_of_life.parallel import ParallelSimulation
+from blog_post_code.game_of_life.sparse import SparseSimulation
+
+DEFAULT_SIZES = (10, 100, 1_000, 4_000, 16_000)
+DEFAULT_DENSITIES = (0.1, 0.5)
+DEFAULT_DTYPES = ("int64", "uint8")
+
+# rough bytes needed per cell (per byte of the dtype for the dtype-sensitive
+# backends), used to skip combinations that would not fit in --max-memory
+_BYTES_PER_CELL: Dict[str, float] = {
+    "count_neighbors": 3,
+    "count_neighbors_np": 4,
+    "dense": 6,
+    "bitpacked": 0.5,
+    "sparse": 8,
+    "parallel": 0.5,
+    "hashlife": 400,
+}
+_DTYPE_SENSITIVE = {"count_neighbors", "count_neighbors_np", "dense"}
+
+
+@dataclass
+class BenchmarkResult:
+    """One timed combination of backend, grid size, density and dtype."""
+
+    backend: str
+    size: int
+    density: float
+    dtype: str
+    generations: int
+    seconds: Optional[float] = None
+    cells_per_second: Optional[float] = None
+    peak_bytes: Optional[int] = None
+    peak_bytes_per_generation: Optional[int] = None
+    allocations_per_generation: Optional[float] = None
+    skipped: bool = False
+
+
+@contextmanager
+def _count_neighbors_stepper(grid: NDArray) -> Iterator[Callable[[], object]]:
+    yield lambda: count_neighbors(grid)
+
+
+@contextmanager
+def _count_neighbors_np_stepper(grid: NDArray) -> Iterator[Callable[[], object]]:
+    yield lambda: count_neighbors_np(grid)
+
+
+@contextmanager
+def _dense_stepper(grid: NDArray) -> Iterator[Callable[[], object]]:
+    generations = simulate(grid)
+    yield lambda: next(generations)
+
+
+@contextmanager
+def _bitpacked_stepper(grid: NDArray) -> Iterator[Callable[[], object]]:
+    width = grid.shape[1]
+    state = [pack_grid(grid)]
+
+    def step():
+        state[0] = step_packed(state[0], width)
+
+    yield step
+
+
+@contextmanager
+def _sparse_stepper(grid: NDArray) -> Iterator[Callable[[], object]]:
+    yield SparseSimulation(grid).step
+
+
+@contextmanager
+def _parallel_stepper(grid: NDArray) -> Iterator[Callable[[], object]]:
+    with ParallelSimulation(grid, executor="thread") as simulation:
+        yield simulation.step
+
+
+@contextmanager
+def _hashlife_stepper(grid: NDArray) -> Iterator[Callable[[], object]]:
+    life = HashLife(grid)
+    yield lambda: life.advance(1)
+
+
+BACKENDS: Dict[str, Callable[[NDArray], ContextManager[Callable[[], object]]]] = {
+    "count_neighbors": _count_neighbors_stepper,
+    "count_neighbors_np": _count_neighbors_np_stepper,
+    "dense": _dense_stepper,
+    "bitpacked": _bitpacked_stepper,
+    "sparse": _sparse_stepper,
+    "parallel": _parallel_stepper,
+    "hashlife": _hashlife_stepper,
+}
+
+
+def create_grid(size: int, density: float, dtype: str, seed=0) -> NDArray:
+    """Create a random size by size grid with the given fraction of live cells."""
+    rng = default_rng(seed=seed)
+    return (rng.random((size, size)) < density).astype(dtype)
+
+
+def _estimated_bytes(backend: str, size: int, dtype: str) -> float:
+    itemsize = np.dtype(dtype).itemsize if backend in _DTYPE_SENSITIVE else 8
+    return _BYTES_PER_CELL[backend] * itemsize * size * size
+
+
+def _held_blocks() -> int:
+    """The number of memory blocks traced by tracemalloc that are still held."""
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    return sum(stat.count for stat in snapshot.statistics("filename"))
+
+
+def benchmark(
+    backend: str,
+    size: int,
+    density: float,
+    dtype: str,
+    generations: int = 10,
+    repeat: int = 3,
+) -> BenchmarkResult:
+    """Time and trace one backend on a random grid."""
+
+    if not np.issubdtype(np.dtype(dtype), np.integer):
+        # the convolutions count neighbours in the grid's own dtype
+        raise ValueError(f"Neighbour counts need an integer dtype, got {dtype!r}.")
+    grid = create_grid(size, density, dtype)
+    make_stepper = BACKENDS[backend]
+
+    best = float("inf")
+    for _ in range(repeat):
+        with make_stepper(grid) as step:
+            step()  # warm up, e.g. the first dense fallback or pool start-up
+            start = time.perf_counter()
+            for _ in range(generations):
+                step()
+            best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        baseline = peak = tracemalloc.get_traced_memory()[0]
+        per_generation = 0
+        with make_stepper(grid) as step:
+            # count the blocks the stepper starts with, leaving the snapshot
+            # taken to do so out of the peak
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            held = _held_blocks()
+            tracemalloc.reset_peak()
+            for _ in range(generations):
+                # fold the peak so far into the run's before measuring this generation
+                before, high = tracemalloc.get_traced_memory()
+                peak = max(peak, high)
+                tracemalloc.reset_peak()
+                step()
+                per_generation = max(
+                    per_generation, tracemalloc.get_traced_memory()[1] - before
+                )
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            blocks = max(_held_blocks() - held, 0)
+        peak_bytes = peak - baseline
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        backend=backend,
+        size=size,
+        density=density,
+        dtype=dtype,
+        generations=generations,
+        seconds=best,
+        cells_per_second=size * size * generations / best,
+        peak_bytes=peak_bytes,
+        peak_bytes_per_generation=per_generation,
+        allocations_per_generation=blocks / generations if generations else 0.0,
+    )
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    densities: Sequence[float] = DEFAULT_DENSITIES,
+    dtypes: Sequence[str] = DEFAULT_DTYPES,
+    backends: Sequence[str] = tuple(BACKENDS),
+    generations: int = 10,
+    repeat: int = 3,
+    max_memory: float = 2**31,
+) -> Iterator[BenchmarkResult]:
+    """
+    Benchmark every combination of the arguments, yielding results as they
+    complete. Backends that convert the grid internally are only run with the
+    first dtype.
+    """
+    for backend, size, density, dtype in it.product(backends, sizes, densities, dtypes):
+        if backend not in _DTYPE_SENSITIVE and dtype != dtypes[0]:
+            continue
+        if _estimated_bytes(backend, size, dtype) > max_memory:
+            yield BenchmarkResult(
+                backend, size, density, dtype, generations, skipped=True
+            )
+            continue
+        yield benchmark(backend, size, density, dtype, generations, repeat)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmarks and write one JSON object per line."""
+
+    parser = benchmark_parser(__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--densities", type=float, nargs="+", default=DEFAULT_DENSITIES)
+    parser.add_argument("--dtypes", nargs="+", default=DEFAULT_DTYPES)
+    parser.add_argument(
+        "--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS)
+    )
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--max-memory",
+        type=float,
+        default=2**31,
+        help="skip combinations above this many bytes",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.sizes,
+        args.densities,
+        args.dtypes,
+        args.backends,
+        args.generations,
+        args.repeat,
+        args.max_memory,
+    )
+    write_results(results, args.output, environment())
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
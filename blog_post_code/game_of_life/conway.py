@@ -2,7 +2,7 @@
 
 import itertools as it
 from os import PathLike
-from typing import Generator, List
+from typing import Callable, Dict, Generator, Tuple, Union
 from pathlib import Path
 from importlib.resources import files
 
@@ -15,6 +15,10 @@ from scipy import ndimage
 
 from numpy.typing import NDArray
 
+from blog_post_code.game_of_life.bitpacked import simulate_packed, unpack_grid
+from blog_post_code.game_of_life.patterns import parse_plaintext
+from blog_post_code.game_of_life.rules import CONWAY, Rule
+
 PLAINTEXT_GLIDER = (
     "......................O.O...........\n"
     "........................O...........\n"
@@ -29,29 +33,53 @@ PLAINTEXT_GLIDER = (
 
 IMAGE_DIR = Path(str(files("blog_post_code.game_of_life").joinpath("images")))
 
- 
+
 def create_random_grid(length: int = 10, width: int = 10, seed=None) -> NDArray:
     """Create a random 2D binary array sampled from a uniform distribution."""
     rng = default_rng(seed=seed)
     return rng.integers(low=0, high=2, size=length * width).reshape(length, width)
 
 
-def count_neighbors_np(grid: NDArray) -> NDArray:
-    """Count neighbors using numpy's sliding_window_view, treating off-grid neighbors as dead.
-    Returns an array of the same size."""
+# how off-grid neighbours are treated, as (scipy.ndimage mode, np.pad mode)
+BOUNDARY_MODES: Dict[str, Tuple[str, str]] = {
+    "dead": ("constant", "constant"),
+    "toroidal": ("wrap", "wrap"),
+    "reflect": ("reflect", "symmetric"),
+}
+
+
+def _check_boundary(boundary: str) -> None:
+    if boundary not in BOUNDARY_MODES:
+        raise ValueError(
+            f"Unknown boundary {boundary!r}, expected one of {sorted(BOUNDARY_MODES)}."
+        )
+
+
+def count_neighbors_np(grid: NDArray, boundary: str = "dead") -> NDArray:
+    """Count neighbors using numpy's sliding_window_view, treating off-grid neighbors
+    according to boundary (see BOUNDARY_MODES). Returns an array of the same size."""
 
-    padded = np.pad(grid, 1)
+    _check_boundary(boundary)
+    padded = np.pad(grid, 1, mode=BOUNDARY_MODES[boundary][1])
     windows = stride_tricks.sliding_window_view(padded, (3, 3))
 
     return windows.sum(axis=(2, 3)) - grid
 
 
-def count_neighbors(grid: NDArray) -> NDArray:
+def count_neighbors(grid: NDArray, boundary: str = "dead") -> NDArray:
     """Count the live neighbors of each cell in a 2D binary array
-    treating off-grid neighbors as dead. Returns an np.array of
-    the same size as the input."""
+    treating off-grid neighbors according to boundary: "dead" (the default),
+    "toroidal" (wrapping around the edges) or "reflect" (mirroring the edge cells).
+    Returns an np.array of the same size as the input."""
+    _check_boundary(boundary)
     kernel = np.array([1, 1, 1, 1, 0, 1, 1, 1, 1]).reshape(3, 3)
-    return ndimage.convolve(grid, kernel, mode="constant", cval=0.0)
+    return ndimage.convolve(grid, kernel, mode=BOUNDARY_MODES[boundary][0], cval=0.0)
+
+
+def apply_rule(grid: NDArray, rule: Rule = CONWAY, boundary: str = "dead") -> NDArray:
+    """Step one generation of a Life-like rule with a single lookup-table pass."""
+
+    return rule.apply(grid, count_neighbors(grid, boundary))
 
 
 def apply_conways_rules(grid: NDArray) -> NDArray:
@@ -63,29 +91,78 @@ def apply_conways_rules(grid: NDArray) -> NDArray:
     3) All other live cells die in the next generation. Similarly, all other dead cells stay dead.
     """
 
-    neighbors = count_neighbors(grid)
-    return ((neighbors == 2) & grid) | (neighbors == 3)
+    return apply_rule(grid, CONWAY)
 
 
-def simulate(grid: NDArray) -> Generator[NDArray, None, None]:
-    """Simulate infinite generations of the Game of Life provided a starting grid."""
+def _simulate_dense(
+    grid: NDArray, rule: Rule, boundary: str
+) -> Generator[NDArray, None, None]:
+    """Step the full grid with apply_rule each generation."""
 
     while True:
-        grid = apply_conways_rules(grid)
+        grid = apply_rule(grid, rule, boundary)
         yield grid
 
 
+def _simulate_bitpacked(
+    grid: NDArray, rule: Rule, boundary: str
+) -> Generator[NDArray, None, None]:
+    """Step a bit-packed copy of the grid (B3/S23 with dead boundaries only),
+    unpacking each generation."""
+
+    width = grid.shape[1]
+    for packed in simulate_packed(grid):
+        yield unpack_grid(packed, width).astype(grid.dtype)
+
+
+SIMULATION_BACKENDS: Dict[
+    str, Callable[[NDArray, Rule, str], Generator[NDArray, None, None]]
+] = {
+    "dense": _simulate_dense,
+    "bitpacked": _simulate_bitpacked,
+}
+
+
+def simulate(
+    grid: NDArray,
+    backend: str = "dense",
+    rule: Union[Rule, str] = CONWAY,
+    boundary: str = "dead",
+) -> Generator[NDArray, None, None]:
+    """Simulate infinite generations of the Game of Life provided a starting grid.
+
+    The backend selects the stepping engine (one of SIMULATION_BACKENDS): "dense"
+    convolves the full grid every generation while "bitpacked" stores 64 cells
+    per uint64 word and steps with bitwise adder logic. The dense backend also
+    runs any Life-like rule (a Rule or a string such as "B36/S23") with any of
+    the BOUNDARY_MODES."""
+
+    if backend not in SIMULATION_BACKENDS:
+        raise ValueError(
+            f"Unknown backend {backend!r}, "
+            f"expected one of {sorted(SIMULATION_BACKENDS)}."
+        )
+    _check_boundary(boundary)
+    rule = Rule.parse(rule) if isinstance(rule, str) else rule
+
+    if backend == "bitpacked" and (rule != CONWAY or boundary != "dead"):
+        raise ValueError(
+            "The bitpacked backend only supports B3/S23 with dead boundaries."
+        )
+
+    return SIMULATION_BACKENDS[backend](grid, rule, boundary)
+
+
 def convert_plaintext(text: str) -> NDArray:
     """Provided a plaintext game of life code where each row has the same number of elements,
     return the corresponding numpy array."""
 
-    replaced_digits: List[str] = text.replace(".", "0").replace("O", "1").split()
-    exploded: List[List[str]] = list(map(list, replaced_digits))
-
-    return np.array(exploded).astype("int")
+    return parse_plaintext(text)
 
 
-def save_conway_to_gif(grid: NDArray, filepath: PathLike[str], nframes: int = 100) -> None:
+def save_conway_to_gif(
+    grid: NDArray, filepath: PathLike[str], nframes: int = 100
+) -> None:
     """
     Create a gif of the first nframes of
     evolution of the provided grid and save it to filepath.
@@ -96,7 +173,7 @@ def save_conway_to_gif(grid: NDArray, filepath: PathLike[str], nframes: int = 10
 
     # create an initial matrix figure without ticks or labels
     fig = plt.figure()
-    plot = plt.matshow(data[0], fignum=0, cmap=plt.get_cmap("binary")) # type: ignore
+    plot = plt.matshow(data[0], fignum=0, cmap=plt.get_cmap("binary"))  # type: ignore
     plt.tick_params(
         left=False,
         right=False,
@@ -0,0 +1,125 @@
+"""
+Detect when a simulation becomes static or periodic.
+
+Every generation is hashed with Zobrist hashing: each cell has a random 64-bit
+key and a board's hash is the XOR of the keys of its live cells. Stepping only
+has to XOR in the keys of the cells that changed, so hashing costs a vectorized
+comparison with the previous generation rather than a full serialization. A
+bounded history maps hashes to the generation they were first seen at, so a
+repeated hash gives the transient length and the period of the cycle.
+
+A repeat is detected by hash alone, so two different boards colliding on the
+same 64-bit hash would be reported as a cycle; with random keys that is
+vanishingly unlikely over any realistic run.
+"""
+
+import itertools as it
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Generator, Iterable, Optional
+
+import numpy as np
+from numpy.random import default_rng
+from numpy.typing import NDArray
+
+from blog_post_code.game_of_life.conway import simulate
+
+
+@dataclass(frozen=True)
+class Cycle:
+    """
+    A detected cycle: generation transient is the first generation that is
+    repeated and the boards repeat every period generations from there on.
+    A period of 1 means the board has become static.
+    """
+
+    transient: int
+    period: int
+
+    def equivalent_generation(self, generation: int) -> int:
+        """Return the earliest generation with the same board as generation."""
+        if generation < self.transient:
+            return generation
+        return self.transient + (generation - self.transient) % self.period
+
+
+class CycleDetector:
+    """
+    Hash each generation of a simulation and report the first repeat.
+
+    The detector starts at generation 0 with grid. max_history bounds the
+    number of remembered hashes, so only cycles with a period of at most
+    max_history generations are detected.
+    """
+
+    def __init__(self, grid: NDArray, max_history: int = 1024, seed=0) -> None:
+        self.max_history = max_history
+        self.keys = default_rng(seed).integers(
+            0, np.iinfo(np.uint64).max, size=grid.shape, dtype=np.uint64, endpoint=True
+        )
+        self.generation = 0
+        self.previous = grid
+        self.hash = self._xor_keys(grid != 0)
+        self.cycle: Optional[Cycle] = None
+
+        self._seen: Dict[int, int] = {self.hash: 0}
+        self._order: Deque[int] = deque([self.hash])
+
+    def _xor_keys(self, mask: NDArray) -> int:
+        return int(np.bitwise_xor.reduce(self.keys[mask], initial=np.uint64(0)))
+
+    def update(self, grid: NDArray) -> Optional[Cycle]:
+        """Record the next generation, returning the cycle once a board repeats."""
+
+        self.hash ^= self._xor_keys(grid != self.previous)
+        self.previous = grid
+        self.generation += 1
+
+        first_seen = self._seen.get(self.hash)
+        if first_seen is not None:
+            self.cycle = Cycle(first_seen, self.generation - first_seen)
+            return self.cycle
+
+        self._seen[self.hash] = self.generation
+        self._order.append(self.hash)
+        if len(self._order) > self.max_history:
+            del self._seen[self._order.popleft()]
+        return None
+
+    def watch(self, generations: Iterable[NDArray]) -> Generator[NDArray, None, None]:
+        """
+        Pass through generations (for example simulate(grid)) until a board
+        repeats, then stop; the repeated board is the last one yielded and
+        the detected cycle is available as self.cycle.
+        """
+        for grid in generations:
+            yield grid
+            if self.update(grid) is not None:
+                return
+
+
+def generation_n(
+    grid: NDArray, n: int, max_history: int = 1024, **simulate_kwargs
+) -> NDArray:
+    """
+    Return generation n of grid, stopping the simulation as soon as it becomes
+    static or periodic and extrapolating directly to generation n from there.
+    Any extra keyword arguments are passed on to simulate().
+    """
+    if n == 0:
+        return grid
+
+    detector = CycleDetector(grid, max_history=max_history)
+    board = grid
+    for board in it.islice(detector.watch(simulate(grid, **simulate_kwargs)), n):
+        pass
+
+    if detector.cycle is None or detector.generation == n:
+        return board
+
+    # the current board equals generation transient, so only the offset into
+    # the cycle is left to simulate
+    remaining = detector.cycle.equivalent_generation(n) - detector.cycle.transient
+    for board in it.islice(simulate(board, **simulate_kwargs), remaining):
+        pass
+    return board
@@ -0,0 +1,293 @@
+"""
+A HashLife engine for running patterns over very many generations.
+
+The board is stored as a quadtree whose nodes are canonicalized, so identical
+regions anywhere in space or time share a single node. The result of advancing
+a node is memoized, which lets the engine jump 2**j generations in one call at
+a cost that depends on the pattern's complexity rather than its area or the
+number of generations.
+
+Unlike simulate(), HashLife runs on an unbounded plane: cells beyond the edges
+of the starting grid are dead but are not held dead, so patterns that reach
+the border keep evolving instead of being clipped.
+"""
+
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from weakref import WeakValueDictionary
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+class Node:
+    """
+    A canonical quadtree node of level k covering a 2**k by 2**k square.
+
+    a, b, c and d are the north-west, north-east, south-west and south-east
+    quadrants (each of level k - 1) and n is the number of live cells. Level
+    zero nodes are single cells and have no quadrants.
+    """
+
+    __slots__ = ("k", "a", "b", "c", "d", "n", "__weakref__")
+
+    def __init__(self, k: int, a=None, b=None, c=None, d=None, n: int = 0) -> None:
+        self.k = k
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        self.n = n
+
+    def __repr__(self) -> str:
+        return f"Node(k={self.k}, n={self.n})"
+
+
+OFF = Node(0, n=0)
+ON = Node(0, n=1)
+
+
+class HashLife:
+    """
+    Advance a Game of Life pattern with memoized quadtree stepping.
+
+    The pattern is positioned with its top left cell at board coordinate (0, 0),
+    the same as the grid it was loaded from. max_cache_size caps the number of
+    memoized successor results; the least recently used results are evicted
+    once the cap is reached.
+    """
+
+    def __init__(self, grid: NDArray, max_cache_size: int = 1_000_000) -> None:
+        self.max_cache_size = max_cache_size
+        self.shape: Tuple[int, int] = grid.shape
+        self.generation = 0
+
+        self._nodes: "WeakValueDictionary[tuple, Node]" = WeakValueDictionary()
+        self._zeros: List[Node] = [OFF]
+        self._cache: "OrderedDict[Tuple[Node, int], Node]" = OrderedDict()
+
+        size = max(8, *grid.shape)
+        level = (size - 1).bit_length()
+        square = np.zeros((1 << level, 1 << level), dtype=bool)
+        square[: grid.shape[0], : grid.shape[1]] = grid != 0
+
+        self.root = self._build(square, level)
+        self.top = 0
+        self.left = 0
+
+    @property
+    def population(self) -> int:
+        """The number of live cells in the pattern."""
+        return self.root.n
+
+    @property
+    def cache_size(self) -> int:
+        """The number of memoized successor results currently held."""
+        return len(self._cache)
+
+    def clear_cache(self) -> None:
+        """Drop every memoized successor result."""
+        self._cache.clear()
+
+    def join(self, a: Node, b: Node, c: Node, d: Node) -> Node:
+        """Return the canonical node with quadrants a, b, c and d."""
+        key = (a, b, c, d)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(a.k + 1, a, b, c, d, a.n + b.n + c.n + d.n)
+            self._nodes[key] = node
+        return node
+
+    def zero(self, k: int) -> Node:
+        """Return the empty node of level k."""
+        while len(self._zeros) <= k:
+            z = self._zeros[-1]
+            self._zeros.append(self.join(z, z, z, z))
+        return self._zeros[k]
+
+    def centre(self, m: Node) -> Node:
+        """Return a node one level up with m in its centre, surrounded by dead cells."""
+        z = self.zero(m.k - 1)
+        return self.join(
+            self.join(z, z, z, m.a),
+            self.join(z, z, m.b, z),
+            self.join(z, m.c, z, z),
+            self.join(m.d, z, z, z),
+        )
+
+    def successor(self, m: Node, j: int) -> Node:
+        """
+        Return the centre of m (one level down) advanced 2**j generations,
+        where j is clamped to at most m.k - 2.
+        """
+        j = min(j, m.k - 2)
+        if m.n == 0:
+            return m.a
+
+        key = (m, j)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        if m.k == 2:
+            result = self._life_4x4(m)
+        else:
+            join, successor = self.join, self.successor
+            a, b, c, d = m.a, m.b, m.c, m.d
+            c1 = successor(join(a.a, a.b, a.c, a.d), j)
+            c2 = successor(join(a.b, b.a, a.d, b.c), j)
+            c3 = successor(join(b.a, b.b, b.c, b.d), j)
+            c4 = successor(join(a.c, a.d, c.a, c.b), j)
+            c5 = successor(join(a.d, b.c, c.b, d.a), j)
+            c6 = successor(join(b.c, b.d, d.a, d.b), j)
+            c7 = successor(join(c.a, c.b, c.c, c.d), j)
+            c8 = successor(join(c.b, d.a, c.d, d.c), j)
+            c9 = successor(join(d.a, d.b, d.c, d.d), j)
+
+            if j < m.k - 2:
+                # the nine overlapping results are already far enough along;
+                # stitch their central quadrants together
+                result = join(
+                    join(c1.d, c2.c, c4.b, c5.a),
+                    join(c2.d, c3.c, c5.b, c6.a),
+                    join(c4.d, c5.c, c7.b, c8.a),
+                    join(c5.d, c6.c, c8.b, c9.a),
+                )
+            else:
+                # advance a second time to reach the full 2**(k - 2) generations
+                result = join(
+                    successor(join(c1, c2, c4, c5), j),
+                    successor(join(c2, c3, c5, c6), j),
+                    successor(join(c4, c5, c7, c8), j),
+                    successor(join(c5, c6, c8, c9), j),
+                )
+
+        self._cache[key] = result
+        if len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def step_pow2(self, j: int) -> None:
+        """Advance the pattern 2**j generations in a single call."""
+
+        root = self.root
+        while root.k < max(3, j + 2) or not self._is_padded(root):
+            self.top -= 1 << (root.k - 1)
+            self.left -= 1 << (root.k - 1)
+            root = self.centre(root)
+
+        self.top += 1 << (root.k - 2)
+        self.left += 1 << (root.k - 2)
+        self.root = self._crop(self.successor(root, j))
+        self.generation += 1 << j
+
+    def advance(self, generations: int) -> None:
+        """Advance the pattern by an arbitrary number of generations."""
+
+        j = 0
+        while generations:
+            if generations & 1:
+                self.step_pow2(j)
+            generations >>= 1
+            j += 1
+
+    def to_array(
+        self,
+        top: int = 0,
+        left: int = 0,
+        height: Optional[int] = None,
+        width: Optional[int] = None,
+    ) -> NDArray:
+        """
+        Return the window of the board with its top left corner at (top, left)
+        as a 2D int array. The height and width default to the shape of the
+        grid the pattern was loaded from.
+        """
+        height = self.shape[0] if height is None else height
+        width = self.shape[1] if width is None else width
+        out = np.zeros((height, width), dtype=int)
+        self._fill(self.root, self.top - top, self.left - left, out)
+        return out
+
+    def _build(self, block: NDArray, k: int) -> Node:
+        """Build the canonical node for a 2**k by 2**k boolean block."""
+        if not block.any():
+            return self.zero(k)
+        if k == 0:
+            return ON
+
+        half = 1 << (k - 1)
+        return self.join(
+            self._build(block[:half, :half], k - 1),
+            self._build(block[:half, half:], k - 1),
+            self._build(block[half:, :half], k - 1),
+            self._build(block[half:, half:], k - 1),
+        )
+
+    def _fill(self, node: Node, y: int, x: int, out: NDArray) -> None:
+        """Write the live cells of node (top left at y, x) that fall inside out."""
+        size = 1 << node.k
+        if (
+            node.n == 0
+            or y >= out.shape[0]
+            or x >= out.shape[1]
+            or y + size <= 0
+            or x + size <= 0
+        ):
+            return
+        if node.k == 0:
+            out[y, x] = 1
+            return
+
+        half = size >> 1
+        self._fill(node.a, y, x, out)
+        self._fill(node.b, y, x + half, out)
+        self._fill(node.c, y + half, x, out)
+        self._fill(node.d, y + half, x + half, out)
+
+    def _life_4x4(self, m: Node) -> Node:
+        """Advance the central 2x2 cells of a level 2 node one generation."""
+        a, b, c, d = m.a, m.b, m.c, m.d
+        cells = [
+            [a.a.n, a.b.n, b.a.n, b.b.n],
+            [a.c.n, a.d.n, b.c.n, b.d.n],
+            [c.a.n, c.b.n, d.a.n, d.b.n],
+            [c.c.n, c.d.n, d.c.n, d.d.n],
+        ]
+
+        def rule(y: int, x: int) -> Node:
+            neighbors = sum(
+                cells[y + dy][x + dx]
+                for dy in (-1, 0, 1)
+                for dx in (-1, 0, 1)
+                if dy or dx
+            )
+            alive = neighbors == 3 or (neighbors == 2 and cells[y][x])
+            return ON if alive else OFF
+
+        return self.join(rule(1, 1), rule(1, 2), rule(2, 1), rule(2, 2))
+
+    @staticmethod
+    def _is_padded(m: Node) -> bool:
+        """Whether every live cell of m lies in its central 2**(k - 2) square."""
+        return (
+            m.a.n == m.a.d.d.n
+            and m.b.n == m.b.c.c.n
+            and m.c.n == m.c.b.b.n
+            and m.d.n == m.d.a.a.n
+        )
+
+    def _crop(self, m: Node) -> Node:
+        """Shrink m while all of its live cells fit in its central quadrants."""
+        while (
+            m.k > 3
+            and m.a.n == m.a.d.n
+            and m.b.n == m.b.c.n
+            and m.c.n == m.c.b.n
+            and m.d.n == m.d.a.n
+        ):
+            self.top += 1 << (m.k - 2)
+            self.left += 1 << (m.k - 2)
+            m = self.join(m.a.d, m.b.c, m.c.b, m.d.a)
+        return m
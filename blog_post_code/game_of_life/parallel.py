@@ -0,0 +1,165 @@
+"""
+Multi-core Game of Life stepping over horizontal strips of a bit-packed board.
+
+The board is bit-packed (see bitpacked.py) into two buffers, the current and
+the next generation, and split into one strip of rows per worker. Each
+generation every worker reads its strip plus a one row halo above and below
+from the current buffer and writes its strip of the next buffer. Workers are
+either processes attached to the buffers through multiprocessing.shared_memory
+or threads, which run concurrently because numpy releases the GIL inside the
+bitwise kernels. Off-grid cells are dead, exactly as in count_neighbors.
+"""
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Generator, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from blog_post_code.game_of_life.bitpacked import pack_grid, step_packed, unpack_grid
+
+# the buffers a process pool worker attached to in _attach_shared_buffers
+_WORKER_MEMORY: List[SharedMemory] = []
+_WORKER_BUFFERS: List[NDArray[np.uint64]] = []
+_WORKER_WIDTH = 0
+
+
+def _step_strip(
+    src: NDArray[np.uint64], dst: NDArray[np.uint64], y0: int, y1: int, width: int
+) -> None:
+    """Write rows y0 to y1 of the next generation of src into dst."""
+    lo, hi = max(y0 - 1, 0), min(y1 + 1, src.shape[0])
+    stepped = step_packed(src[lo:hi], width)
+    dst[y0:y1] = stepped[y0 - lo : y1 - lo]
+
+
+def _attach_shared_buffers(
+    names: List[str], shape: Tuple[int, int], width: int
+) -> None:
+    """Process pool initializer: map both shared buffers into the worker."""
+    global _WORKER_WIDTH
+
+    for name in names:
+        memory = SharedMemory(name=name)
+        _WORKER_MEMORY.append(memory)
+        _WORKER_BUFFERS.append(np.ndarray(shape, dtype=np.uint64, buffer=memory.buf))
+    _WORKER_WIDTH = width
+
+
+def _step_shared_strip(current: int, y0: int, y1: int) -> None:
+    """Process pool task: step one strip from the current shared buffer to the other."""
+    _step_strip(
+        _WORKER_BUFFERS[current], _WORKER_BUFFERS[1 - current], y0, y1, _WORKER_WIDTH
+    )
+
+
+class ParallelSimulation:
+    """
+    Step a grid across a pool of workers, one strip of rows per worker.
+
+    executor is "process" (a process pool over shared memory) or "thread" (a
+    thread pool over ordinary arrays); workers defaults to the number of CPUs.
+    Use it as a context manager, or call close(), to release the pool and the
+    shared memory.
+    """
+
+    def __init__(
+        self, grid: NDArray, workers: Optional[int] = None, executor: str = "process"
+    ) -> None:
+        rows, self.width = grid.shape
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+        self.generation = 0
+
+        edges = np.linspace(0, rows, min(self.workers, rows) + 1).astype(int)
+        self.strips = list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+        packed = pack_grid(grid)
+        self._memory: List[SharedMemory] = []
+        self._pool: Executor
+
+        if executor == "process":
+            self._memory = [
+                SharedMemory(create=True, size=packed.nbytes) for _ in range(2)
+            ]
+            self._buffers = [
+                np.ndarray(packed.shape, dtype=np.uint64, buffer=memory.buf)
+                for memory in self._memory
+            ]
+            self._pool = ProcessPoolExecutor(
+                self.workers,
+                initializer=_attach_shared_buffers,
+                initargs=([m.name for m in self._memory], packed.shape, self.width),
+            )
+        elif executor == "thread":
+            self._buffers = [np.empty_like(packed), np.empty_like(packed)]
+            self._pool = ThreadPoolExecutor(self.workers)
+        else:
+            raise ValueError(
+                f"Unknown executor {executor!r}, expected 'process' or 'thread'."
+            )
+
+        self._buffers[0][:] = packed
+        self._current = 0
+
+    def __enter__(self) -> "ParallelSimulation":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Generator[NDArray, None, None]:
+        while True:
+            self.step()
+            yield self.grid
+
+    @property
+    def grid(self) -> NDArray:
+        """The current generation as an unpacked 2D array."""
+        return unpack_grid(self._buffers[self._current], self.width)
+
+    def step(self, generations: int = 1) -> None:
+        """Advance the board, finishing every strip before the next generation."""
+
+        for _ in range(generations):
+            if self.executor == "process":
+                futures = [
+                    self._pool.submit(_step_shared_strip, self._current, y0, y1)
+                    for y0, y1 in self.strips
+                ]
+            else:
+                src, dst = (
+                    self._buffers[self._current],
+                    self._buffers[1 - self._current],
+                )
+                futures = [
+                    self._pool.submit(_step_strip, src, dst, y0, y1, self.width)
+                    for y0, y1 in self.strips
+                ]
+
+            for future in futures:
+                future.result()
+
+            self._current = 1 - self._current
+            self.generation += 1
+
+    def close(self) -> None:
+        """Shut down the worker pool and free any shared memory."""
+        self._pool.shutdown()
+        # drop our views before closing the mappings they point into
+        self._buffers = []
+        for memory in self._memory:
+            memory.close()
+            memory.unlink()
+        self._memory = []
+
+
+def simulate_parallel(
+    grid: NDArray, workers: Optional[int] = None, executor: str = "process"
+) -> Generator[NDArray, None, None]:
+    """Simulate infinite generations of the Game of Life across a pool of workers."""
+
+    with ParallelSimulation(grid, workers, executor) as simulation:
+        yield from simulation
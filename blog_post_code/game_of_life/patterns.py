@@ -0,0 +1,373 @@
+"""
+Read and write Game of Life patterns.
+
+Plaintext (.cells), run length encoded (.rle) and Life 1.06 (.lif) patterns
+are parsed with numpy operations over whole byte buffers or token arrays
+instead of building Python lists cell by cell.
+
+Large boards can be checkpointed to a compact snapshot file: a 32 byte header
+(magic, rows, cols, generation) followed by the board bit-packed as in
+bitpacked.py. Snapshots are written in row chunks and loaded as a memory map,
+and resumed simulations stream each generation from one file into the next,
+so multi-gigabyte boards never need a full copy in RAM.
+"""
+
+import re
+import struct
+import tempfile
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Generator, Optional, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from blog_post_code.caching import write_entry
+from blog_post_code.game_of_life.bitpacked import (
+    pack_grid,
+    step_packed_chunks,
+    unpack_grid,
+    words_per_row,
+)
+from blog_post_code.game_of_life.rules import CONWAY, Rule
+
+_RLE_HEADER = re.compile(
+    r"^x\s*=\s*(?P<x>\d+)\s*,\s*y\s*=\s*(?P<y>\d+)(?:\s*,\s*rule\s*=\s*(?P<rule>\S+))?",
+    re.IGNORECASE,
+)
+_RLE_TAGS = np.frombuffer(b"bo$!", dtype=np.uint8)
+_WHITESPACE = np.frombuffer(b" \t\r\n", dtype=np.uint8)
+_RLE_LINE_LENGTH = 70
+
+SNAPSHOT_MAGIC = b"GOLSNAP1"
+_SNAPSHOT_HEADER = struct.Struct("<8sQQQ")
+
+
+def parse_plaintext(text: str) -> NDArray:
+    """
+    Parse a plaintext pattern, where "O" (or "*") is a live cell and "." a dead
+    one. Lines starting with "!" are comments and short rows are padded with
+    dead cells, so an empty line is a row of dead cells.
+    """
+    lines = [line.strip() for line in text.splitlines() if not line.startswith("!")]
+    width = max(map(len, lines), default=0)
+    padded = "".join(line.ljust(width, ".") for line in lines).encode("ascii")
+
+    cells = np.frombuffer(padded, dtype=np.uint8).reshape(len(lines), width)
+    return ((cells == ord("O")) | (cells == ord("*"))).astype(int)
+
+
+def to_plaintext(grid: NDArray) -> str:
+    """Write a 2D binary array as a plaintext pattern."""
+    chars = np.where(grid != 0, ord("O"), ord(".")).astype(np.uint8)
+    newlines = np.full((grid.shape[0], 1), ord("\n"), dtype=np.uint8)
+    return np.hstack([chars, newlines]).tobytes().decode("ascii")
+
+
+def rle_rule(text: str) -> Rule:
+    """Return the rule named in an RLE header, defaulting to B3/S23."""
+    for line in text.splitlines():
+        match = _RLE_HEADER.match(line.strip())
+        if match:
+            return Rule.parse(match["rule"]) if match["rule"] else CONWAY
+    return CONWAY
+
+
+def parse_rle(text: str) -> NDArray:
+    """Parse a run length encoded pattern into a 2D int array."""
+
+    height = width = 0
+    body = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            continue
+        match = _RLE_HEADER.match(stripped)
+        if match:
+            height, width = int(match["y"]), int(match["x"])
+        else:
+            body.append(stripped)
+
+    data = np.frombuffer(
+        "".join(body).split("!", 1)[0].encode("ascii") + b"!", np.uint8
+    )
+    data = data[~np.isin(data, _WHITESPACE)]
+
+    # every tag closes a token; the digits before it (if any) are its count
+    tag_positions = np.flatnonzero(np.isin(data, _RLE_TAGS))
+    tags = data[tag_positions]
+    digit_positions = np.flatnonzero((data >= ord("0")) & (data <= ord("9")))
+    token_of_digit = np.searchsorted(tag_positions, digit_positions)
+    place = tag_positions[token_of_digit] - 1 - digit_positions
+    counts = np.bincount(
+        token_of_digit,
+        weights=(data[digit_positions] - ord("0")) * 10.0**place,
+        minlength=len(tags),
+    ).astype(np.int64)
+    counts[counts == 0] = 1
+
+    is_newline = tags == ord("$")
+    is_live = tags == ord("o")
+    run = np.where(is_newline, 0, counts)
+    run[tags == ord("!")] = 0
+
+    # row of each token, and its column measured from the last row break
+    row_breaks = np.where(is_newline, counts, 0)
+    rows = np.cumsum(row_breaks) - row_breaks
+    ends = np.cumsum(run)
+    cols = ends - run - np.maximum.accumulate(np.where(is_newline, ends, 0))
+
+    height = max(height, int(rows[-1]) + 1 if len(rows) else 0)
+    width = max(width, int((cols + run).max()) if len(run) else 0)
+    grid = np.zeros((height, width), dtype=int)
+
+    # expand every live run into the flat indices of its cells
+    starts = (rows * width + cols)[is_live]
+    lengths = counts[is_live]
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    grid.ravel()[np.repeat(starts, lengths) + offsets] = 1
+
+    return grid
+
+
+def to_rle(grid: NDArray, rule: Rule = CONWAY) -> str:
+    """Write a 2D binary array as a run length encoded pattern."""
+
+    height, width = grid.shape
+    # end every row with a sentinel value 2, standing for "$"
+    cells = np.hstack([(grid != 0).astype(np.int8), np.full((height, 1), 2, np.int8)])
+    flat = cells.ravel()
+
+    starts = np.flatnonzero(np.diff(flat, prepend=-1))
+    values = flat[starts]
+    lengths = np.diff(np.append(starts, flat.size))
+
+    # dead runs at the end of a row are implied by the row break
+    keep = ~((values == 0) & (np.append(values[1:], 2) == 2))
+    values, lengths = values[keep], lengths[keep]
+
+    # merge the row breaks of consecutive empty rows and drop the final ones
+    if values.size:
+        group_starts = np.flatnonzero(np.diff(values, prepend=-1))
+        values = values[group_starts]
+        lengths = np.add.reduceat(lengths, group_starts)
+    if values.size and values[-1] == 2:
+        values, lengths = values[:-1], lengths[:-1]
+
+    # close the pattern with "!" (tag 3)
+    values = np.append(values, 3)
+    lengths = np.append(lengths, 1)
+
+    # each token is its count (omitted when 1) followed by its tag
+    digits = np.where(lengths > 1, np.floor(np.log10(np.maximum(lengths, 1))) + 1, 0)
+    digits = digits.astype(np.int64)
+    token_lengths = digits + 1
+    starts = np.cumsum(token_lengths) - token_lengths
+
+    # break lines before the tokens that start past each multiple of the (approximate)
+    # line length, so that no run is split across lines
+    line_ids = starts // _RLE_LINE_LENGTH
+    breaks = np.diff(line_ids, prepend=0) > 0
+    starts = starts + np.cumsum(breaks)
+
+    out = np.full(int(starts[-1] + 1), ord("\n"), dtype=np.uint8)
+    out[starts + digits] = _RLE_TAGS[values]
+
+    token_of_digit = np.repeat(np.arange(len(lengths)), digits)
+    place = np.arange(digits.sum()) - np.repeat(np.cumsum(digits) - digits, digits)
+    power = 10 ** (digits[token_of_digit] - 1 - place)
+    out[starts[token_of_digit] + place] = (
+        ord("0") + lengths[token_of_digit] // power % 10
+    )
+
+    header = f"x = {width}, y = {height}, rule = {rule}\n"
+    return header + out.tobytes().decode("ascii") + "\n"
+
+
+def parse_life106(text: str) -> NDArray:
+    """
+    Parse a Life 1.06 pattern (one "x y" pair per live cell) into a 2D int
+    array whose top left corner is the top left live cell.
+    """
+    body = " ".join(line for line in text.splitlines() if not line.startswith("#"))
+    coords = np.array(body.split(), dtype=np.int64).reshape(-1, 2)
+    if coords.size == 0:
+        return np.zeros((0, 0), dtype=int)
+
+    xs, ys = coords[:, 0] - coords[:, 0].min(), coords[:, 1] - coords[:, 1].min()
+    grid = np.zeros((ys.max() + 1, xs.max() + 1), dtype=int)
+    grid[ys, xs] = 1
+    return grid
+
+
+def to_life106(grid: NDArray) -> str:
+    """Write a 2D binary array as a Life 1.06 pattern."""
+    ys, xs = np.nonzero(grid)
+    cells = "".join(f"{x} {y}\n" for x, y in zip(xs.tolist(), ys.tolist()))
+    return "#Life 1.06\n" + cells
+
+
+@dataclass
+class Snapshot:
+    """
+    A board loaded from a snapshot file: packed is the bit-packed board (a
+    memory map unless loaded with mmap=False), width the number of columns and
+    generation the generation it was saved at. path is the file it was loaded
+    from and writable whether resume checkpoints generations into that file.
+    """
+
+    packed: NDArray[np.uint64]
+    width: int
+    generation: int
+    path: Optional[Union[PathLike, str]] = None
+    writable: bool = False
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """The shape of the unpacked board."""
+        return (self.packed.shape[0], self.width)
+
+    def to_grid(self) -> NDArray:
+        """Unpack the board into a 2D array."""
+        return unpack_grid(self.packed, self.width)
+
+    def resume(
+        self, chunk_rows: int = 4096
+    ) -> Generator[NDArray[np.uint64], None, None]:
+        """
+        Continue simulating from the snapshot, yielding the board after each
+        generation and advancing self.generation.
+
+        Each generation is stepped from the mapped board into a new snapshot
+        file chunk_rows rows at a time (see step_packed_chunks), header last,
+        and the file is renamed into place and mapped only once it is
+        complete. A snapshot loaded with writable=True is checkpointed this
+        way, replacing its own file every generation, so a run stopped part
+        way through leaves the last whole generation there. Otherwise the
+        generations go to a temporary file beside the snapshot, removed when
+        the generator is closed, and a snapshot loaded with mmap=False is
+        stepped in memory.
+
+        Every board yielded is self.packed, bit-packed as in bitpacked.py (cell
+        c of a row is bit c % 64 of word c // 64, in (rows, words_per_row(width))
+        uint64 words) rather than the 2D arrays of simulate(). Unpack it with
+        to_grid() where such an array is needed, e.g. on boards small enough
+        to hold unpacked.
+        """
+        if self.writable and self.path is not None:
+            yield from self._resume_into(Path(self.path), chunk_rows)
+        elif isinstance(self.packed, np.memmap):
+            parent = Path(self.packed.filename).parent
+            with tempfile.TemporaryDirectory(dir=parent) as directory:
+                yield from self._resume_into(Path(directory, "board.snap"), chunk_rows)
+        else:
+            while True:
+                self.packed = np.concatenate(
+                    list(step_packed_chunks(self.packed, self.width, chunk_rows))
+                )
+                self.generation += 1
+                yield self.packed
+
+    def _resume_into(
+        self, path: Path, chunk_rows: int
+    ) -> Generator[NDArray[np.uint64], None, None]:
+        shape = self.packed.shape
+        while True:
+            generation = self.generation + 1
+            write_entry(
+                path,
+                lambda staging: _write_stepped_snapshot(
+                    self.packed, self.width, generation, staging, chunk_rows
+                ),
+            )
+            self.packed = np.memmap(
+                path, dtype="<u8", mode="r", offset=_SNAPSHOT_HEADER.size, shape=shape
+            )
+            self.generation = generation
+            yield self.packed
+
+
+def _write_snapshot_header(file, rows: int, cols: int, generation: int) -> None:
+    file.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, rows, cols, generation))
+
+
+def _write_stepped_snapshot(
+    packed: NDArray[np.uint64],
+    width: int,
+    generation: int,
+    path: Path,
+    chunk_rows: int,
+) -> None:
+    with open(path, "wb") as file:
+        file.seek(_SNAPSHOT_HEADER.size)
+        for chunk in step_packed_chunks(packed, width, chunk_rows):
+            file.write(chunk.astype("<u8", copy=False).tobytes())
+        # the header goes in last, once the whole board has been written
+        file.seek(0)
+        _write_snapshot_header(file, packed.shape[0], width, generation)
+
+
+def save_snapshot(
+    grid: NDArray,
+    path: Union[PathLike, str],
+    generation: int = 0,
+    chunk_rows: int = 4096,
+) -> None:
+    """Save a 2D binary array as a bit-packed snapshot, chunk_rows rows at a time."""
+    rows, cols = grid.shape
+    with open(path, "wb") as file:
+        _write_snapshot_header(file, rows, cols, generation)
+        for start in range(0, rows, chunk_rows):
+            file.write(pack_grid(grid[start : start + chunk_rows]).tobytes())
+
+
+def save_packed_snapshot(
+    packed: NDArray[np.uint64],
+    width: int,
+    path: Union[PathLike, str],
+    generation: int = 0,
+) -> None:
+    """Save an already bit-packed board (e.g. from simulate_packed) as a snapshot."""
+    with open(path, "wb") as file:
+        _write_snapshot_header(file, packed.shape[0], width, generation)
+        file.write(np.ascontiguousarray(packed, dtype="<u8").tobytes())
+
+
+def load_snapshot(
+    path: Union[PathLike, str], mmap: bool = True, writable: bool = False
+) -> Snapshot:
+    """
+    Load a snapshot, memory-mapping the packed board unless mmap is False. With
+    writable, Snapshot.resume checkpoints every generation into the file.
+    """
+    with open(path, "rb") as file:
+        magic, rows, cols, generation = _SNAPSHOT_HEADER.unpack(
+            file.read(_SNAPSHOT_HEADER.size)
+        )
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a Game of Life snapshot.")
+
+    shape = (rows, words_per_row(cols))
+    if mmap:
+        packed = np.memmap(
+            path,
+            dtype="<u8",
+            mode="r",
+            offset=_SNAPSHOT_HEADER.size,
+            shape=shape,
+        )
+    else:
+        packed = np.fromfile(
+            path, dtype="<u8", offset=_SNAPSHOT_HEADER.size, count=shape[0] * shape[1]
+        ).reshape(shape)
+
+    return Snapshot(
+        packed=packed,
+        width=cols,
+        generation=generation,
+        path=path,
+        writable=writable,
+    )
@@ -0,0 +1,286 @@
+"""
+Stream Game of Life generations straight to an animated GIF.
+
+Frames are consumed one at a time from a generator, mapped directly to palette
+indices (dead cells to index 0, live cells to index 1) and scaled up by an
+integer factor, so no matplotlib figure, external ffmpeg or list of frames is
+needed. Each frame after the first only encodes the bounding box of the cells
+that changed and is drawn over the previous frame.
+
+By default the image data is LZW compressed in pure Python, which keeps files
+small. For very large boards compress=False switches to byte-aligned
+"uncompressed" LZW: with a minimum code size of 7 every code is exactly one
+byte and a clear code is emitted often enough that the code width never grows,
+which trades file size for an encoder that is fully vectorized with numpy.
+"""
+
+import itertools as it
+import struct
+from os import PathLike
+from typing import BinaryIO, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from blog_post_code.game_of_life.conway import simulate
+
+# palette of the "binary" colormap used by save_conway_to_gif:
+# dead is white, live is black
+BINARY_PALETTE: Sequence[Tuple[int, int, int]] = ((255, 255, 255), (0, 0, 0))
+
+_MIN_CODE_SIZE = 7
+_CLEAR_CODE = 1 << _MIN_CODE_SIZE
+_END_CODE = _CLEAR_CODE + 1
+# literals between clear codes, small enough that the 8-bit code width never grows
+_CODES_PER_CLEAR = 120
+_MAX_CODE = 4096
+
+
+def _lzw_uncompressed(pixels: NDArray[np.uint8]) -> NDArray[np.uint8]:
+    """Encode palette indices (all below 128) as one-byte LZW codes, clearing often."""
+
+    pixels = pixels.ravel()
+    full = len(pixels) // _CODES_PER_CLEAR * _CODES_PER_CLEAR
+    groups = pixels[:full].reshape(-1, _CODES_PER_CLEAR)
+    clears = np.full((len(groups), 1), _CLEAR_CODE, dtype=np.uint8)
+
+    return np.concatenate(
+        [
+            np.hstack([clears, groups]).ravel(),
+            [_CLEAR_CODE],
+            pixels[full:],
+            [_END_CODE],
+        ]
+    ).astype(np.uint8)
+
+
+def _lzw_compress(pixels: NDArray[np.uint8]) -> NDArray[np.uint8]:
+    """LZW compress palette indices (all below 128) into a GIF code stream."""
+
+    first_code = _END_CODE + 1
+    width = _MIN_CODE_SIZE + 1
+    table: Dict[int, int] = {}
+    next_code = first_code
+
+    out = bytearray()
+    bits = _CLEAR_CODE
+    nbits = width
+
+    data = pixels.ravel().tobytes()
+    prefix = data[0]
+    for pixel in data[1:]:
+        key = prefix << 8 | pixel
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        bits |= prefix << nbits
+        nbits += width
+        while nbits >= 8:
+            out.append(bits & 0xFF)
+            bits >>= 8
+            nbits -= 8
+
+        if next_code < _MAX_CODE:
+            table[key] = next_code
+            if next_code == 1 << width:
+                width += 1
+            next_code += 1
+        else:
+            # the table is full: start over with a clear code
+            bits |= _CLEAR_CODE << nbits
+            nbits += width
+            table.clear()
+            next_code = first_code
+            width = _MIN_CODE_SIZE + 1
+        prefix = pixel
+
+    for code in (prefix, _END_CODE):
+        bits |= code << nbits
+        nbits += width
+        if code == prefix and next_code < _MAX_CODE and next_code == 1 << width:
+            width += 1
+    while nbits > 0:
+        out.append(bits & 0xFF)
+        bits >>= 8
+        nbits -= 8
+
+    return np.frombuffer(bytes(out), dtype=np.uint8)
+
+
+def _sub_blocks(data: NDArray[np.uint8]) -> bytes:
+    """Split data into terminated, length-prefixed sub-blocks of at most 255 bytes."""
+
+    full = len(data) // 255 * 255
+    blocks = data[:full].reshape(-1, 255)
+    lengths = np.full((len(blocks), 1), 255, dtype=np.uint8)
+    rest = data[full:]
+
+    return b"".join(
+        [
+            np.hstack([lengths, blocks]).tobytes(),
+            bytes([len(rest)]) + rest.tobytes() if len(rest) else b"",
+            b"\x00",
+        ]
+    )
+
+
+class GifWriter:
+    """
+    Write 2D binary grids to an animated GIF one frame at a time.
+
+    Each cell becomes a scale by scale block of pixels coloured from palette
+    (which has at most 128 colours), and every frame is shown for delay
+    hundredths of a second. The animation repeats loop times, 0 meaning forever.
+    compress=False skips LZW compression in favour of the faster vectorized
+    encoding.
+    """
+
+    def __init__(
+        self,
+        file: Union[PathLike, str, BinaryIO],
+        shape: Tuple[int, int],
+        scale: int = 8,
+        delay: int = 20,
+        palette: Sequence[Tuple[int, int, int]] = BINARY_PALETTE,
+        loop: int = 0,
+        compress: bool = True,
+    ) -> None:
+        # checked before the file is opened, so a bad call leaves nothing behind
+        height, width = shape[0] * scale, shape[1] * scale
+        if max(height, width) > 0xFFFF:
+            raise ValueError(f"A {height}x{width} pixel image is too large for a GIF.")
+        if not 1 <= len(palette) <= 128:
+            raise ValueError(f"Expected 1 to 128 colours, got {len(palette)}.")
+
+        self.shape = shape
+        self.scale = scale
+        self.delay = delay
+        self.compress = compress
+        self.frames = 0
+        self._previous: Optional[NDArray] = None
+        self._finished = False
+
+        self._owns_file = not hasattr(file, "write")
+        self._file: BinaryIO = (
+            open(file, "wb") if self._owns_file else file  # type: ignore
+        )
+
+        table_bits = max(1, (len(palette) - 1).bit_length())
+        colors = np.zeros((1 << table_bits, 3), dtype=np.uint8)
+        colors[: len(palette)] = palette
+
+        self._file.write(b"GIF89a")
+        self._file.write(
+            struct.pack("<HHBBB", width, height, 0xF0 | (table_bits - 1), 0, 0)
+        )
+        self._file.write(colors.tobytes())
+        # NETSCAPE2.0 application extension for looping
+        self._file.write(
+            b"\x21\xff\x0bNETSCAPE2.0" + struct.pack("<BBHB", 3, 1, loop, 0)
+        )
+
+    def __enter__(self) -> "GifWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write_frame(self, grid: NDArray) -> None:
+        """Append a frame, encoding only the region that changed since the last one."""
+
+        cells = (grid != 0).astype(np.uint8)
+        if cells.shape != tuple(self.shape):
+            raise ValueError(
+                f"Expected a grid of shape {self.shape}, got {cells.shape}."
+            )
+
+        if self._previous is None:
+            top, left, bottom, right = 0, 0, cells.shape[0], cells.shape[1]
+        else:
+            rows, cols = np.nonzero(cells != self._previous)
+            if len(rows):
+                top, left = rows.min(), cols.min()
+                bottom, right = rows.max() + 1, cols.max() + 1
+            else:
+                # nothing changed: redraw one cell so the frame still takes its time
+                top, left, bottom, right = 0, 0, 1, 1
+
+        region = cells[top:bottom, left:right]
+        pixels = np.repeat(np.repeat(region, self.scale, axis=0), self.scale, axis=1)
+        scale = self.scale
+
+        # graphic control extension: disposal method 1 (draw over the previous frame)
+        self._file.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x04, self.delay, 0, 0))
+        self._file.write(
+            struct.pack(
+                "<BHHHHB",
+                0x2C,
+                left * scale,
+                top * scale,
+                pixels.shape[1],
+                pixels.shape[0],
+                0,
+            )
+        )
+        self._file.write(bytes([_MIN_CODE_SIZE]))
+        encode = _lzw_compress if self.compress else _lzw_uncompressed
+        self._file.write(_sub_blocks(encode(pixels)))
+
+        self._previous = cells
+        self.frames += 1
+
+    def close(self) -> None:
+        """Write the GIF trailer and close the file if this writer opened it."""
+        if self._finished:
+            return
+        self._finished = True
+        self._file.write(b"\x3b")
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+def write_gif(
+    generations: Iterable[NDArray],
+    filepath: Union[PathLike, str, BinaryIO],
+    nframes: Optional[int] = None,
+    scale: int = 8,
+    fps: int = 5,
+    compress: bool = True,
+) -> int:
+    """
+    Lazily render generations (for example simulate(grid)) to a GIF, stopping
+    after nframes if given. Returns the number of frames written.
+    """
+    generations = iter(generations)
+    if nframes is not None:
+        generations = it.islice(generations, nframes)
+
+    first = next(generations, None)
+    if first is None:
+        raise ValueError("Cannot write a GIF without any frames.")
+
+    with GifWriter(
+        filepath, first.shape, scale=scale, delay=round(100 / fps), compress=compress
+    ) as writer:
+        for grid in it.chain([first], generations):
+            writer.write_frame(grid)
+
+    return writer.frames
+
+
+def stream_conway_to_gif(
+    grid: NDArray,
+    filepath: Union[PathLike, str],
+    nframes: int = 100,
+    scale: int = 8,
+    compress: bool = True,
+) -> None:
+    """
+    Create a gif of the first nframes of evolution of the provided grid and save
+    it to filepath, like save_conway_to_gif but without holding frames in memory.
+    """
+    write_gif(simulate(grid), filepath, nframes=nframes, scale=scale, compress=compress)
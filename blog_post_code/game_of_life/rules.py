@@ -0,0 +1,69 @@
+"""
+Life-like cellular automaton rules in B/S notation.
+
+A rule such as "B36/S23" (HighLife) lists the neighbour counts for which a dead
+cell is born and a live cell survives. Each rule compiles to an 18 entry lookup
+table indexed by 9 * state + neighbours, so a whole generation is resolved with
+a single vectorized take instead of a chain of comparisons.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import FrozenSet
+
+import numpy as np
+from numpy.typing import NDArray
+
+_RULE_PATTERN = re.compile(r"^B(?P<birth>[0-8]*)/S(?P<survival>[0-8]*)$", re.IGNORECASE)
+_REVERSED_RULE_PATTERN = re.compile(
+    r"^S(?P<survival>[0-8]*)/B(?P<birth>[0-8]*)$", re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A Life-like rule: the neighbour counts that give birth and survival."""
+
+    birth: FrozenSet[int]
+    survival: FrozenSet[int]
+
+    @classmethod
+    def parse(cls, notation: str) -> "Rule":
+        """Parse a rule written as "B3/S23" (or "S23/B3")."""
+        match = _RULE_PATTERN.match(notation.strip()) or _REVERSED_RULE_PATTERN.match(
+            notation.strip()
+        )
+        if match is None:
+            raise ValueError(
+                f"Could not parse rule {notation!r}, expected e.g. 'B3/S23'."
+            )
+
+        return cls(
+            birth=frozenset(map(int, match["birth"])),
+            survival=frozenset(map(int, match["survival"])),
+        )
+
+    def __str__(self) -> str:
+        birth = "".join(map(str, sorted(self.birth)))
+        survival = "".join(map(str, sorted(self.survival)))
+        return f"B{birth}/S{survival}"
+
+    @cached_property
+    def table(self) -> NDArray[np.uint8]:
+        """The next state for each index 9 * state + neighbours."""
+        table = np.zeros(18, dtype=np.uint8)
+        table[list(self.birth)] = 1
+        table[[9 + count for count in self.survival]] = 1
+        return table
+
+    def apply(self, grid: NDArray, neighbors: NDArray) -> NDArray:
+        """Return the next generation of grid given its neighbour counts."""
+        index = neighbors + 9 * (grid != 0)
+        return np.take(self.table.astype(grid.dtype, copy=False), index)
+
+
+CONWAY = Rule.parse("B3/S23")
+HIGHLIFE = Rule.parse("B36/S23")
+SEEDS = Rule.parse("B2/S")
+DAY_AND_NIGHT = Rule.parse("B3678/S34678")
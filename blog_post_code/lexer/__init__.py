@@ -1,3 +1,22 @@
 from blog_post_code.lexer._lexer import Token, Lexer
+from blog_post_code.lexer._batch import lex_batch
+from blog_post_code.lexer._incremental import IncrementalLexer, TokenEdit
+from blog_post_code.lexer._spans import LineIndex, Span, TokenSpans
+from blog_post_code.lexer._scanner import CompactTokens, tokenize, tokenize_compact
+from blog_post_code.lexer._stream import tokenize_file, tokenize_stream
 
-__all__ = ["Token", "Lexer"]
+__all__ = [
+    "Token",
+    "Lexer",
+    "IncrementalLexer",
+    "TokenEdit",
+    "LineIndex",
+    "Span",
+    "TokenSpans",
+    "CompactTokens",
+    "lex_batch",
+    "tokenize",
+    "tokenize_compact",
+    "tokenize_file",
+    "tokenize_stream",
+]
@@ -0,0 +1,147 @@
+"""
+Tokenize many files and source texts at once across a pool of processes.
+
+Files and texts are passed to lex_batch separately, since a str could be
+either a path or the text of a program.
+
+Sources are split into size-balanced chunks (largest first, each onto the
+least loaded chunk) so that one big file does not leave the other workers
+idle, and several chunks per worker let fast workers pick up the remainder.
+Workers send back each result as its three CompactTokens arrays, which pickle
+as raw buffers instead of one object per token.
+
+With a cache_dir, each result is also saved as an .npz file keyed by the
+hash of the source text (see caching.py), so unchanged files are loaded
+rather than lexed on the next run.
+"""
+
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from blog_post_code.caching import content_key, write_entry
+from blog_post_code.lexer._scanner import CompactTokens, tokenize_compact
+
+# the version of the cached token arrays (see caching.py)
+CACHE_VERSION = 1
+# chunks handed out per worker, so that idle workers can take the remaining ones
+CHUNKS_PER_WORKER = 4
+
+# a path to read, or the source text itself (paths are always Path objects here)
+Source = Union[Path, str]
+_Result = Tuple[int, Optional[str], NDArray, NDArray, NDArray]
+
+
+def _source_size(source: Source) -> int:
+    return len(source) if isinstance(source, str) else os.path.getsize(source)
+
+
+def balanced_chunks(sizes: Sequence[int], chunks: int) -> List[List[int]]:
+    """Split the indices of sizes into at most chunks groups of about equal size."""
+    heap = [(0, chunk) for chunk in range(min(chunks, len(sizes)))]
+    groups: List[List[int]] = [[] for _ in heap]
+    for index in sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True):
+        load, chunk = heapq.heappop(heap)
+        groups[chunk].append(index)
+        heapq.heappush(heap, (load + sizes[index], chunk))
+    return groups
+
+
+def _write_tokens(tokens: CompactTokens, path: Path) -> None:
+    with open(path, "wb") as file:
+        np.savez(file, kinds=tokens.kinds, starts=tokens.starts, ends=tokens.ends)
+
+
+def _lex_source(
+    source: Source, cache_dir: Optional[Path], encoding: str
+) -> CompactTokens:
+    # decoded as is, since reading in text mode would turn "\r\n" into "\n"
+    text = source if isinstance(source, str) else source.read_bytes().decode(encoding)
+    if cache_dir is None:
+        return tokenize_compact(text)
+
+    entry = Path(cache_dir) / f"{content_key(CACHE_VERSION, text)}.npz"
+    if entry.exists():
+        with np.load(entry) as cached:
+            return CompactTokens(
+                text, cached["kinds"], cached["starts"], cached["ends"]
+            )
+
+    tokens = tokenize_compact(text)
+    write_entry(entry, lambda staging: _write_tokens(tokens, staging))
+    return tokens
+
+
+def _lex_chunk(
+    chunk: List[Tuple[int, Source]], cache_dir: Optional[Path], encoding: str
+) -> List[_Result]:
+    results = []
+    for index, source in chunk:
+        tokens = _lex_source(source, cache_dir, encoding)
+        # the caller already has the text of sources given as strings
+        text = None if isinstance(source, str) else tokens.text
+        results.append((index, text, tokens.kinds, tokens.starts, tokens.ends))
+    return results
+
+
+def _check_sources(
+    paths: Sequence[Union[PathLike, str]], texts: Sequence[str]
+) -> List[Source]:
+    # a lone str or Path would otherwise be iterated character by character
+    for name, given in (("paths", paths), ("texts", texts)):
+        if isinstance(given, (str, bytes, PathLike)):
+            raise TypeError(f"{name} must be a sequence, got {type(given).__name__}.")
+    for path in paths:
+        if not isinstance(path, (str, PathLike)):
+            raise TypeError(f"Expected a path, got {type(path).__name__}.")
+    for text in texts:
+        if not isinstance(text, str):
+            raise TypeError(
+                f"Expected source text as a str, got {type(text).__name__}; "
+                "pass files as paths instead."
+            )
+    return [Path(path) for path in paths] + list(texts)
+
+
+def lex_batch(
+    *,
+    paths: Sequence[Union[PathLike, str]] = (),
+    texts: Sequence[str] = (),
+    workers: Optional[int] = None,
+    cache_dir: Optional[Path] = None,
+    encoding: str = "utf-8",
+) -> List[CompactTokens]:
+    """
+    Tokenize the files at paths (each a str or PathLike, read with encoding)
+    and the source texts in texts, returning a CompactTokens for each path
+    followed by one for each text. The sources are lexed in a pool of workers
+    processes (by default one per CPU) in size-balanced chunks, or in this
+    process with workers=1. cache_dir enables the result cache.
+    """
+    sources = _check_sources(paths, texts)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(sources) < 2:
+        return [_lex_source(source, cache_dir, encoding) for source in sources]
+
+    sizes = [_source_size(source) for source in sources]
+    chunks = [
+        [(index, sources[index]) for index in group]
+        for group in balanced_chunks(sizes, workers * CHUNKS_PER_WORKER)
+    ]
+
+    results: List[Optional[CompactTokens]] = [None] * len(sources)
+    with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+        for chunk_results in pool.map(
+            _lex_chunk, chunks, [cache_dir] * len(chunks), [encoding] * len(chunks)
+        ):
+            for index, text, kinds, starts, ends in chunk_results:
+                source = sources[index]
+                text = source if isinstance(source, str) else text
+                results[index] = CompactTokens(text, kinds, starts, ends)
+    return results  # type: ignore
@@ -0,0 +1,124 @@
+"""
+Re-lex only the part of a document touched by an edit.
+
+IncrementalLexer keeps the tokens of its text as a CompactTokens. A token's
+extent only depends on its own characters and the one after it, so every
+token ending before the edit is unchanged and lexing restarts right after the
+last of them. Tokens are read from there in a window that grows until a new
+token starts where an old token after the edit started (shifted by the change
+in length): lexing from a token start over the same text gives the same
+tokens, so from that point on the old tokens are reused with shifted offsets.
+The trailing Eof always resyncs, so the window never grows past the end.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from blog_post_code.lexer._scanner import CompactTokens, tokenize_compact
+
+# characters lexed beyond the edit before checking for a resync
+_WINDOW_SLACK = 64
+
+
+@dataclass(frozen=True)
+class TokenEdit:
+    """
+    tokens[index:index + removed] of the old stream became
+    tokens[index:index + added] of the new one.
+    """
+
+    index: int
+    removed: int
+    added: int
+
+
+class IncrementalLexer:
+    """
+    Tokens of a text that is edited in place. edit() updates the text and
+    tokens and returns which tokens changed; tokens is always equal to
+    tokenize_compact(text).
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens = tokenize_compact(text)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.tokens)
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> TokenEdit:
+        """Replace deleted characters at offset with inserted and re-lex around them."""
+
+        old, text = self.tokens, self.text
+        if not 0 <= offset <= offset + deleted <= len(text):
+            raise ValueError(
+                f"Cannot delete {deleted} characters at {offset} "
+                f"from a text of length {len(text)}."
+            )
+        new_text = text[:offset] + inserted + text[offset + deleted :]
+        delta = len(inserted) - deleted
+        edit_end = offset + len(inserted)
+
+        # searching with the arrays' own dtype saves numpy converting the whole array
+        offset_type = old.starts.dtype.type
+
+        # tokens ending before the edit keep their extent, so restart after the last one
+        first = int(np.searchsorted(old.ends, offset_type(offset), side="left"))
+        restart = int(old.ends[first - 1]) if first else 0
+
+        # lexing can resync at the start of any old token after the edit
+        later = int(
+            np.searchsorted(old.starts, offset_type(offset + deleted), side="left")
+        )
+        resync_starts = old.starts[later:]
+
+        window = edit_end - restart + _WINDOW_SLACK
+        while True:
+            stop = min(restart + window, len(new_text))
+            part = tokenize_compact(new_text[restart:stop])
+            starts = part.starts.astype(np.int64) + restart
+            ends = part.ends.astype(np.int64) + restart
+            count = len(part)
+            if stop < len(new_text):
+                # neither the Eof nor a token reaching the end of the window is final
+                count -= 1
+                if count and ends[count - 1] == stop:
+                    count -= 1
+
+            candidates = np.flatnonzero(starts[:count] >= edit_end)
+            old_starts = (starts[candidates] - delta).astype(old.starts.dtype)
+            found = np.minimum(
+                np.searchsorted(resync_starts, old_starts), len(resync_starts) - 1
+            )
+            matches = np.flatnonzero(resync_starts[found] == old_starts)
+            if len(matches):
+                added = int(candidates[matches[0]])
+                resync = later + int(found[matches[0]])
+                break
+            window *= 2
+
+        dtype = old.starts.dtype if len(new_text) < 2**32 else np.int64
+        self.text = new_text
+        self.tokens = CompactTokens(
+            new_text,
+            np.concatenate([old.kinds[:first], part.kinds[:added], old.kinds[resync:]]),
+            _splice(old.starts, first, starts[:added], resync, delta, dtype),
+            _splice(old.ends, first, ends[:added], resync, delta, dtype),
+        )
+        return TokenEdit(first, resync - first, added)
+
+
+def _splice(offsets, first: int, middle, resync: int, delta: int, dtype):
+    """offsets[:first], then middle, then offsets[resync:] shifted by delta."""
+    spliced = np.empty(first + len(middle) + len(offsets) - resync, dtype=dtype)
+    spliced[:first] = offsets[:first]
+    spliced[first : first + len(middle)] = middle
+    tail = spliced[first + len(middle) :]
+    tail[:] = offsets[resync:]
+    if delta >= 0:
+        tail += delta
+    else:
+        tail -= -delta
+    return spliced
@@ -1,78 +1,141 @@
-from collections import namedtuple
 from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+from blog_post_code.lexer._spans import TokenSpans
 
 
 class TokenBase:
-    def __init_subclass__(cls) -> None:
-        def _token_repr(self):
-            name = self.__class__.__name__
-            return (
-                f"Token.{name}({self.value!r})"
-                if hasattr(self, "value")
-                else f"Token.{name}"
-            )
-
-        def _token_eq(self, other):
-            return repr(self) == repr(other)
-
-        def _token_ne(self, other):
-            return repr(self) != repr(other)
-
-        for name, method in vars(cls).items():
-            if name.startswith("__"):
-                continue
-            method.__repr__ = _token_repr
-            method.__eq__ = _token_eq
-            method.__ne__ = _token_ne
-
-
-class Token(TokenBase):
-    Ident = namedtuple("Ident", ["value"])
-    Int = namedtuple("Int", ["value"])
-    Illegal = namedtuple("Illegal", [])
-    Eof = namedtuple("Eof", [])
-    Assign = namedtuple("Assign", [])
-    Bang = namedtuple("Bang", [])
-    Dash = namedtuple("Dash", [])
-    ForwardSlash = namedtuple("ForwardSlash", [])
-    Asterisk = namedtuple("Asterisk", [])
-    Equal = namedtuple("Equal", [])
-    NotEqual = namedtuple("NotEqual", [])
-    LessThan = namedtuple("LessThan", [])
-    GreaterThan = namedtuple("GreaterThan", [])
-    Plus = namedtuple("Plus", [])
-    Comma = namedtuple("Comma", [])
-    Semicolon = namedtuple("Semicolon", [])
-    Lparen = namedtuple("Lparen", [])
-    Rparen = namedtuple("Rparen", [])
-    LSquirly = namedtuple("LSquirly", [])
-    RSquirly = namedtuple("RSquirly", [])
-    Function = namedtuple("Function", [])
-    Let = namedtuple("Let", [])
-    If = namedtuple("If", [])
-    Else = namedtuple("Else", [])
-    Return = namedtuple("Return", [])
-    True_ = namedtuple("True_", [])
-    False_ = namedtuple("False_", [])
+    """
+    Base class of the token kinds on Token. Each kind has a kind code (its
+    index in TOKEN_KINDS) and tokens compare equal when they have the same
+    kind and value. Kinds without a value are interned, so every
+    Token.Semicolon() is the same object and compares by identity.
+    """
+
+    __slots__ = ()
+    kind: int = -1
+    _fields: Tuple[str, ...] = ()
+
+
+class ValuedToken(TokenBase):
+    """A token kind carrying the text it was read from, e.g. Token.Ident("x")."""
+
+    __slots__ = ("value",)
+    _fields = ("value",)
+
+    def __init__(self, value: str) -> None:
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"Token.{self.__class__.__name__}({self.value!r})"
+
+    def __eq__(self, other) -> bool:
+        return self.__class__ is other.__class__ and self.value == other.value
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    def __hash__(self) -> int:
+        return hash((self.kind, self.value))
+
+
+class ValuelessToken(TokenBase):
+    """A token kind with a single shared instance, e.g. Token.Eof()."""
+
+    __slots__ = ()
+    _instance: "ValuelessToken"
+
+    def __new__(cls) -> "ValuelessToken":
+        return cls._instance
+
+    def __repr__(self) -> str:
+        return f"Token.{self.__class__.__name__}"
+
+    def __reduce__(self):
+        return (self.__class__, ())
+
+
+def _token_kind(name: str, *fields: str) -> type:
+    base = ValuedToken if fields else ValuelessToken
+    return type(name, (base,), {"__slots__": (), "__qualname__": f"Token.{name}"})
+
+
+class Token:
+    Ident = _token_kind("Ident", "value")
+    Int = _token_kind("Int", "value")
+    Illegal = _token_kind("Illegal")
+    Eof = _token_kind("Eof")
+    Assign = _token_kind("Assign")
+    Bang = _token_kind("Bang")
+    Dash = _token_kind("Dash")
+    ForwardSlash = _token_kind("ForwardSlash")
+    Asterisk = _token_kind("Asterisk")
+    Equal = _token_kind("Equal")
+    NotEqual = _token_kind("NotEqual")
+    LessThan = _token_kind("LessThan")
+    GreaterThan = _token_kind("GreaterThan")
+    Plus = _token_kind("Plus")
+    Comma = _token_kind("Comma")
+    Semicolon = _token_kind("Semicolon")
+    Lparen = _token_kind("Lparen")
+    Rparen = _token_kind("Rparen")
+    LSquirly = _token_kind("LSquirly")
+    RSquirly = _token_kind("RSquirly")
+    Function = _token_kind("Function")
+    Let = _token_kind("Let")
+    If = _token_kind("If")
+    Else = _token_kind("Else")
+    Return = _token_kind("Return")
+    True_ = _token_kind("True_")
+    False_ = _token_kind("False_")
+
+
+# kind codes, in the order the kinds are declared on Token
+TOKEN_KINDS: Tuple[str, ...] = tuple(
+    name for name in vars(Token) if not name.startswith("__")
+)
+
+
+def _init_token_kinds() -> None:
+    for code, name in enumerate(TOKEN_KINDS):
+        kind = getattr(Token, name)
+        kind.kind = code
+        if issubclass(kind, ValuelessToken):
+            kind._instance = object.__new__(kind)
+
+
+_init_token_kinds()
 
 
 @dataclass
 class Lexer:
+    """
+    Read the tokens of text one at a time. With record_spans, the start and
+    end offset of every token read is appended to self.spans (see TokenSpans).
+    """
+
     text: str
     position: int = 0
     read_position: int = 0
     ch: str = field(init=False, default="")
+    record_spans: bool = False
+    spans: Optional[TokenSpans] = field(
+        init=False, default=None, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
+        if self.record_spans:
+            self.spans = TokenSpans(self.text)
         self.read_char()
 
     def __iter__(self):
-        while (token := self.next_token()) != Token.Eof():
+        while (token := self.next_token()) is not Token.Eof():
             yield token
         yield token
 
     def next_token(self):
         self.skip_whitespace()
+        start = self.position
 
         match self.ch:
             case "{":
@@ -137,6 +200,10 @@ class Lexer:
                 tok = Token.Illegal()
 
         self.read_char()
+        if self.spans is not None:
+            self.spans.starts.append(start)
+            # Eof ends at the end of the text rather than one past it
+            self.spans.ends.append(min(self.position, len(self.text)))
         return tok
 
     def peek(self) -> str:
@@ -0,0 +1,276 @@
+"""
+A table-driven alternative to Lexer.next_token.
+
+Instead of stepping through the text one character at a time, every character
+is classified at once through a dispatch table (whitespace, identifier letter,
+digit, "=", "!", any other operator, illegal) and tokens are found with numpy
+operations over the classes: identifiers and integers are runs of one class,
+"==" and "!=" are pairs within runs of "=" and "!", and every other operator
+or illegal character is a token on its own. Non-ASCII characters are
+classified once per distinct character with the same str.isspace, str.isalpha
+and str.isdigit checks as Lexer, so the result is always the same token
+sequence as iterating over a Lexer.
+
+The tokens come out as a CompactTokens: a kind code and the start and end
+offsets of each token's text in three arrays. tokenize turns these into Token
+objects.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from blog_post_code.lexer._lexer import TOKEN_KINDS, Token, ValuedToken
+from blog_post_code.lexer._spans import TokenSpans
+
+KIND_CODES: Dict[str, int] = {name: code for code, name in enumerate(TOKEN_KINDS)}
+
+KEYWORDS: Dict[str, str] = {
+    "fn": "Function",
+    "let": "Let",
+    "if": "If",
+    "false": "False_",
+    "true": "True_",
+    "return": "Return",
+    "else": "Else",
+}
+OPERATORS: Dict[str, str] = {
+    "{": "LSquirly",
+    "}": "RSquirly",
+    "(": "Lparen",
+    ")": "Rparen",
+    ",": "Comma",
+    ";": "Semicolon",
+    "+": "Plus",
+    "-": "Dash",
+    "!": "Bang",
+    "!=": "NotEqual",
+    ">": "GreaterThan",
+    "<": "LessThan",
+    "*": "Asterisk",
+    "/": "ForwardSlash",
+    "=": "Assign",
+    "==": "Equal",
+}
+
+# character classes
+_SPACE, _LETTER, _DIGIT, _EQUALS, _BANG, _SINGLE = range(6)
+
+
+def _classify(char: str) -> int:
+    """The class of a character, following the order of checks in Lexer.next_token."""
+    if char.isspace():
+        return _SPACE
+    if char == "=":
+        return _EQUALS
+    if char == "!":
+        return _BANG
+    if char in OPERATORS:
+        return _SINGLE
+    if char.isalpha() or char == "_":
+        return _LETTER
+    if char.isdigit():
+        return _DIGIT
+    return _SINGLE
+
+
+_ASCII_CLASSES = np.array([_classify(chr(code)) for code in range(128)], dtype=np.int8)
+# the kind of every single character token, illegal unless it is an operator
+_ASCII_KINDS = np.array(
+    [KIND_CODES[OPERATORS.get(chr(code), "Illegal")] for code in range(128)],
+    dtype=np.uint8,
+)
+
+_KEYWORD_LENGTH = max(map(len, KEYWORDS))
+_KEYWORD_SHIFTS = np.arange(_KEYWORD_LENGTH, dtype=np.uint64) * np.uint64(7)
+
+
+def _pack_ascii(codes: NDArray) -> NDArray[np.uint64]:
+    """Pack rows of up to _KEYWORD_LENGTH 7-bit codes (zero padded) into integers."""
+    return np.bitwise_or.reduce(codes.astype(np.uint64) << _KEYWORD_SHIFTS, axis=-1)
+
+
+_KEYWORD_PACKS = _pack_ascii(
+    np.array(
+        [
+            [ord(char) for char in word.ljust(_KEYWORD_LENGTH, "\0")]
+            for word in KEYWORDS
+        ],
+        dtype=np.uint64,
+    )
+)
+_KEYWORD_ORDER = np.argsort(_KEYWORD_PACKS)
+_KEYWORD_PACKS = _KEYWORD_PACKS[_KEYWORD_ORDER]
+_KEYWORD_KINDS = np.array(
+    [KIND_CODES[kind] for kind in KEYWORDS.values()], dtype=np.uint8
+)[_KEYWORD_ORDER]
+
+_IDENT = KIND_CODES["Ident"]
+_INT = KIND_CODES["Int"]
+_ILLEGAL = KIND_CODES["Illegal"]
+_EOF = KIND_CODES["Eof"]
+_BANG_KIND = KIND_CODES["Bang"]
+_NOT_EQUAL = KIND_CODES["NotEqual"]
+_ASSIGN = KIND_CODES["Assign"]
+_EQUAL = KIND_CODES["Equal"]
+
+_CONSTRUCTORS = tuple(getattr(Token, name) for name in TOKEN_KINDS)
+_HAS_VALUE = np.array([issubclass(kind, ValuedToken) for kind in _CONSTRUCTORS])
+# the interned instance of each valueless kind
+_VALUELESS = tuple(
+    None if has_value else kind() for kind, has_value in zip(_CONSTRUCTORS, _HAS_VALUE)
+)
+
+
+@dataclass
+class CompactTokens:
+    """
+    Tokens of text stored as parallel arrays: kinds holds the code of each
+    token (an index into TOKEN_KINDS) and starts and ends the offsets of its
+    text, so text[starts[i]:ends[i]] is the value of an Ident or Int. The
+    offsets are uint32, or int64 for texts of 2**32 characters or more. The
+    final token is always Eof, at the end of the text.
+    """
+
+    text: str
+    kinds: NDArray[np.uint8]
+    starts: NDArray[Union[np.uint32, np.int64]]
+    ends: NDArray[Union[np.uint32, np.int64]]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int):
+        code = int(self.kinds[index])
+        token = _VALUELESS[code]
+        if token is None:
+            token = _CONSTRUCTORS[code](
+                self.text[self.starts[index] : self.ends[index]]
+            )
+        return token
+
+    def __iter__(self) -> Iterator:
+        return iter(self.to_tokens())
+
+    def spans(self) -> TokenSpans:
+        """The locations of the tokens, sharing the offset arrays."""
+        return TokenSpans(self.text, self.starts, self.ends)
+
+    def to_tokens(self) -> List:
+        """Create the Token objects."""
+        tokens = list(map(_VALUELESS.__getitem__, self.kinds.tolist()))
+        valued = np.flatnonzero(_HAS_VALUE[self.kinds])
+        text = self.text
+        for index, code, start, end in zip(
+            valued.tolist(),
+            self.kinds[valued].tolist(),
+            self.starts[valued].tolist(),
+            self.ends[valued].tolist(),
+        ):
+            tokens[index] = _CONSTRUCTORS[code](text[start:end])
+        return tokens
+
+
+def _character_classes(text: str) -> Tuple[NDArray[np.uint32], NDArray[np.int8]]:
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+    non_ascii = codes >= 128
+    if not non_ascii.any():
+        return codes, _ASCII_CLASSES[codes]
+
+    classes = np.empty(len(codes), dtype=np.int8)
+    classes[~non_ascii] = _ASCII_CLASSES[codes[~non_ascii]]
+    distinct, inverse = np.unique(codes[non_ascii], return_inverse=True)
+    table = np.array(
+        [_classify(chr(code)) for code in distinct.tolist()], dtype=np.int8
+    )
+    classes[non_ascii] = table[inverse]
+    return codes, classes
+
+
+def tokenize_compact(text: str) -> CompactTokens:
+    """Find every token of text, ending with Eof, without creating any Token objects."""
+
+    codes, classes = _character_classes(text)
+    length = len(classes)
+    positions = np.arange(length)
+    previous = np.concatenate([[-1], classes[:-1]]).astype(np.int8)
+    following = np.concatenate([classes[1:], [-1]]).astype(np.int8)
+
+    is_run = (classes == _LETTER) | (classes == _DIGIT)
+    # "==" and "!=": a "!" always starts a new run of "!" and "=", an "=" only
+    # when it does not follow one, and each run pairs up from its start
+    is_equals = classes == _EQUALS
+    in_pair_run = is_equals | (classes == _BANG)
+    run_starts = (classes == _BANG) | (
+        is_equals & (previous != _EQUALS) & (previous != _BANG)
+    )
+    offset = positions - np.maximum.accumulate(np.where(run_starts, positions, 0))
+    pairs = in_pair_run & (offset % 2 == 0) & (following == _EQUALS)
+
+    token_start = (
+        (is_run & (classes != previous))
+        | (classes == _SINGLE)
+        | (in_pair_run & (offset % 2 == 0))
+    )
+    starts = np.flatnonzero(token_start)
+    start_classes = classes[starts]
+
+    # each run ends where the class next changes
+    changes = np.append(np.flatnonzero(classes[1:] != classes[:-1]) + 1, length)
+    ends = np.where(
+        is_run[starts],
+        changes[np.searchsorted(changes, starts, side="right")],
+        starts + 1,
+    )
+    ends += pairs[starts]
+
+    kinds = np.full(len(starts), _ILLEGAL, dtype=np.uint8)
+    single = start_classes == _SINGLE
+    start_codes = codes[starts]
+    ascii_single = single & (start_codes < 128)
+    kinds[ascii_single] = _ASCII_KINDS[start_codes[ascii_single]]
+    kinds[start_classes == _DIGIT] = _INT
+    is_bang = start_classes == _BANG
+    is_assign = start_classes == _EQUALS
+    kinds[is_bang] = np.where(pairs[starts[is_bang]], _NOT_EQUAL, _BANG_KIND)
+    kinds[is_assign] = np.where(pairs[starts[is_assign]], _EQUAL, _ASSIGN)
+
+    idents = np.flatnonzero(start_classes == _LETTER)
+    kinds[idents] = _IDENT
+    kinds[idents] = _keyword_kinds(codes, starts[idents], ends[idents], kinds[idents])
+
+    offsets_dtype = np.uint32 if length < 2**32 else np.int64
+    return CompactTokens(
+        text,
+        np.append(kinds, _EOF).astype(np.uint8),
+        np.append(starts, length).astype(offsets_dtype),
+        np.append(ends, length).astype(offsets_dtype),
+    )
+
+
+def _keyword_kinds(
+    codes: NDArray[np.uint32], starts: NDArray, ends: NDArray, kinds: NDArray[np.uint8]
+) -> NDArray[np.uint8]:
+    """Replace the kinds of identifiers between starts and ends that are keywords."""
+    kinds = kinds.copy()
+    short = np.flatnonzero(ends - starts <= _KEYWORD_LENGTH)
+    if len(short) == 0:
+        return kinds
+
+    columns = np.arange(_KEYWORD_LENGTH)
+    index = starts[short, None] + columns
+    inside = index < ends[short, None]
+    chars = np.where(inside, codes[np.minimum(index, len(codes) - 1)], 0)
+    packs = _pack_ascii(np.where(chars < 128, chars, 0))
+
+    found = np.minimum(np.searchsorted(_KEYWORD_PACKS, packs), len(_KEYWORD_PACKS) - 1)
+    is_keyword = (_KEYWORD_PACKS[found] == packs) & (chars < 128).all(axis=1)
+    kinds[short[is_keyword]] = _KEYWORD_KINDS[found[is_keyword]]
+    return kinds
+
+
+def tokenize(text: str) -> Iterator:
+    """Yield the same tokens as iter(Lexer(text)), using tokenize_compact."""
+    return iter(tokenize_compact(text))
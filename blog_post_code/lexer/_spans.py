@@ -0,0 +1,82 @@
+"""
+Source locations of tokens, kept out of the tokens themselves.
+
+TokenSpans stores the start and end offset of every token in two flat arrays,
+so recording a location costs two appends rather than an object per token.
+Lines and columns are only worked out when asked for: a LineIndex of the
+offsets where each line starts is built once and an offset is turned into a
+line and column with a binary search.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Iterator, Optional, Sequence, Tuple
+
+_NEWLINE = re.compile("\n")
+
+
+def _offset_typecode(length: int) -> str:
+    return "I" if length < 2**32 else "Q"
+
+
+@dataclass(frozen=True)
+class Span:
+    """Where a token came from: text[start:end], from line and column (both from 1)."""
+
+    start: int
+    end: int
+    line: int
+    column: int
+
+
+class LineIndex:
+    """The offset at which each line of a text starts, lines ending with "\\n"."""
+
+    def __init__(self, text: str) -> None:
+        self.line_starts = array(_offset_typecode(len(text)), [0])
+        self.line_starts.extend(match.end() for match in _NEWLINE.finditer(text))
+
+    def __len__(self) -> int:
+        return len(self.line_starts)
+
+    def line_column(self, offset: int) -> Tuple[int, int]:
+        """The line and column (both from 1) of offset."""
+        line = bisect_right(self.line_starts, offset) - 1
+        return line + 1, offset - self.line_starts[line] + 1
+
+
+class TokenSpans:
+    """
+    The start and end offsets of a sequence of tokens of text. starts and
+    ends may be any sequences of integers, e.g. the arrays of a CompactTokens;
+    by default they are empty arrays to append to while lexing.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        starts: Optional[Sequence[int]] = None,
+        ends: Optional[Sequence[int]] = None,
+    ) -> None:
+        self.text = text
+        typecode = _offset_typecode(len(text))
+        self.starts = array(typecode) if starts is None else starts
+        self.ends = array(typecode) if ends is None else ends
+
+    @cached_property
+    def lines(self) -> LineIndex:
+        return LineIndex(self.text)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Span:
+        start = int(self.starts[index])
+        line, column = self.lines.line_column(start)
+        return Span(start, int(self.ends[index]), line, column)
+
+    def __iter__(self) -> Iterator[Span]:
+        return map(self.__getitem__, range(len(self)))
@@ -0,0 +1,98 @@
+"""
+Tokenize text that arrives in chunks, in bounded memory.
+
+Each chunk is tokenized with tokenize_compact together with whatever was
+held back from the previous chunk. A token that runs up to the end of a chunk
+might continue in the next one (an identifier, an integer, "=" becoming "=="
+or "!" becoming "!="), so it is held back and re-read with the next chunk.
+Lexing from the start of any token gives the same tokens as lexing the whole
+text, so the output is exactly the tokens of the concatenated chunks. Memory
+is bounded by the chunk size plus the longest token.
+"""
+
+import codecs
+import mmap
+from os import PathLike
+from typing import BinaryIO, Iterable, Iterator, TextIO, Union
+
+from blog_post_code.lexer._scanner import CompactTokens, tokenize_compact
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+Source = Union[TextIO, BinaryIO, Iterable[str], Iterable[bytes]]
+
+
+def _decode(chunks: Iterable[Union[str, bytes]], encoding: str) -> Iterator[str]:
+    """Decode bytes chunks incrementally, so characters may be split across chunks."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        yield decoder.decode(chunk) if isinstance(
+            chunk, (bytes, bytearray, memoryview)
+        ) else chunk
+    yield decoder.decode(b"", final=True)
+
+
+def _read_chunks(source: Source, chunk_size: int) -> Iterable[Union[str, bytes]]:
+    if hasattr(source, "read"):
+        return iter(lambda: source.read(chunk_size), source.read(0))  # type: ignore
+    return source  # type: ignore
+
+
+def tokenize_stream(
+    source: Source, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = "utf-8"
+) -> Iterator:
+    """
+    Lazily yield the tokens of source, ending with Token.Eof, the same as
+    iterating over a Lexer of its whole text. source is a text or binary file
+    object (read chunk_size characters or bytes at a time) or an iterable of
+    str or bytes chunks; bytes are decoded with encoding.
+    """
+    held = ""
+    for chunk in _decode(_read_chunks(source, chunk_size), encoding):
+        if not chunk:
+            continue
+        text = held + chunk
+        tokens = tokenize_compact(text)
+
+        # everything but the trailing Eof, less a final token that may continue
+        complete = len(tokens) - 1
+        if complete and tokens.ends[complete - 1] == len(text):
+            complete -= 1
+        held = text[tokens.starts[complete] :] if complete < len(tokens) - 1 else ""
+
+        yield from CompactTokens(
+            text,
+            tokens.kinds[:complete],
+            tokens.starts[:complete],
+            tokens.ends[:complete],
+        )
+
+    yield from tokenize_compact(held)
+
+
+def tokenize_file(
+    path: Union[PathLike, str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+    use_mmap: bool = False,
+) -> Iterator:
+    """
+    Lazily yield the tokens of the file at path (see tokenize_stream). With
+    use_mmap the file is memory-mapped and read chunk_size bytes at a time from
+    the mapping instead of through buffered reads.
+    """
+    with open(path, "rb") as file:
+        if not use_mmap:
+            yield from tokenize_stream(file, chunk_size, encoding)
+            return
+
+        size = file.seek(0, 2)
+        if size == 0:
+            yield from tokenize_stream([], chunk_size, encoding)
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            chunks = (
+                mapped[start : start + chunk_size]
+                for start in range(0, size, chunk_size)
+            )
+            yield from tokenize_stream(chunks, chunk_size, encoding)
@@ -0,0 +1,258 @@
+"""
+Benchmark the lexing engines on synthetic Monkey programs.
+
+Every combination of program size, token mix and engine is timed (best of
+several repeats) and traced with tracemalloc, and one JSON object per
+combination is written out so engines can be compared between releases:
+
+    python -m blog_post_code.lexer.benchmark --sizes 10000 100000 --output results.jsonl
+
+A token mix sets how often identifiers, keywords, operators and integers
+appear in a program and how long the whitespace between them may run, so
+each mix stresses a different path through the lexer. Reported metrics are
+tokens_per_second, peak_bytes (the tracemalloc high-water mark of a run above
+the memory held beforehand) and allocations_per_token (memory blocks made by
+the run and still held by its result, per token).
+
+With --profile each run is also repeated under cProfile, reporting the own
+time and call count of every function of the lexer package (for Lexer:
+read_char, peek, skip_whitespace and so on, with the constructors of the
+token kinds grouped under "token_construction"), along with the lines of the
+package holding the most memory after the traced run.
+"""
+
+import cProfile
+import io
+import itertools as it
+import os
+import pstats
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from numpy.random import default_rng
+
+from blog_post_code.benchmarking import benchmark_parser, environment, write_results
+from blog_post_code.lexer._lexer import Lexer
+from blog_post_code.lexer._scanner import (
+    KEYWORDS,
+    OPERATORS,
+    tokenize,
+    tokenize_compact,
+)
+from blog_post_code.lexer._stream import tokenize_stream
+
+DEFAULT_SIZES = (10_000, 100_000)
+# allocation sites reported with --profile
+PROFILE_SITES = 5
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PACKAGE_FILES = os.path.join(_PACKAGE_DIR, "*")
+# methods of the token kinds, attributed to token construction
+_TOKEN_CONSTRUCTION = {"__init__", "__new__"}
+
+
+@dataclass(frozen=True)
+class TokenMix:
+    """
+    Relative weights of each kind of token in a synthetic program, and the
+    longest run of whitespace characters between two tokens.
+    """
+
+    identifiers: float
+    keywords: float
+    operators: float
+    integers: float
+    max_whitespace: int = 1
+
+
+MIXES: Dict[str, TokenMix] = {
+    "identifier": TokenMix(
+        identifiers=0.7, keywords=0.1, operators=0.15, integers=0.05
+    ),
+    "operator": TokenMix(identifiers=0.15, keywords=0.05, operators=0.7, integers=0.1),
+    "numeric": TokenMix(identifiers=0.1, keywords=0.05, operators=0.15, integers=0.7),
+    "whitespace": TokenMix(
+        identifiers=0.35,
+        keywords=0.15,
+        operators=0.35,
+        integers=0.15,
+        max_whitespace=32,
+    ),
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """One timed and traced run of an engine on a synthetic program."""
+
+    engine: str
+    mix: str
+    size: int
+    tokens: int
+    seconds: float
+    tokens_per_second: float
+    peak_bytes: int
+    allocations_per_token: float
+    profile: Optional[Dict[str, Dict[str, float]]] = None
+    allocation_sites: Optional[Dict[str, int]] = None
+
+
+ENGINES: Dict[str, Callable[[str], object]] = {
+    "lexer": lambda text: list(Lexer(text)),
+    "tokenize": lambda text: list(tokenize(text)),
+    "tokenize_compact": tokenize_compact,
+    "tokenize_stream": lambda text: list(tokenize_stream(io.StringIO(text))),
+}
+
+
+def create_program(size: int, mix: TokenMix, seed=0) -> str:
+    """Create a random Monkey program of size characters with the given token mix."""
+    rng = default_rng(seed=seed)
+    keywords, operators = list(KEYWORDS), list(OPERATORS)
+    weights = np.array([mix.identifiers, mix.keywords, mix.operators, mix.integers])
+
+    pieces: List[str] = []
+    length = 0
+    while length < size:
+        # draw in batches, as most tokens are a few characters long
+        for category in rng.choice(
+            4, size=max(size // 8, 16), p=weights / weights.sum()
+        ):
+            if category == 0:
+                letters = rng.integers(ord("a"), ord("z") + 1, size=rng.integers(1, 13))
+                piece = bytes(letters.astype(np.uint8)).decode()
+            elif category == 1:
+                piece = keywords[rng.integers(len(keywords))]
+            elif category == 2:
+                piece = operators[rng.integers(len(operators))]
+            else:
+                piece = str(rng.integers(10**8))
+            spaces = rng.choice(
+                [" ", " ", "\t", "\n"], size=rng.integers(1, mix.max_whitespace + 1)
+            )
+            pieces.append(piece + "".join(spaces))
+            length += len(pieces[-1])
+    return "".join(pieces)[:size]
+
+
+def _profile_lexer(
+    engine: Callable[[str], object], text: str
+) -> Dict[str, Dict[str, float]]:
+    """Own time and calls of each function of the lexer package run by engine."""
+    profiler = cProfile.Profile()
+    profiler.runcall(engine, text)
+
+    functions: Dict[str, Dict[str, float]] = {}
+    for (filename, _, name), (_, calls, own, _, _) in pstats.Stats(
+        profiler
+    ).stats.items():
+        filename = os.path.abspath(filename)
+        if os.path.dirname(filename) != _PACKAGE_DIR or filename == os.path.abspath(
+            __file__
+        ):
+            continue
+        if name in _TOKEN_CONSTRUCTION:
+            name = "token_construction"
+        entry = functions.setdefault(name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += calls
+        entry["seconds"] += own
+    return functions
+
+
+def _allocation_sites(snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+    """The lines of the lexer package holding the most memory in snapshot."""
+    package = snapshot.filter_traces(
+        [tracemalloc.Filter(True, _PACKAGE_FILES), tracemalloc.Filter(False, __file__)]
+    )
+    return {
+        f"{os.path.basename(frame.filename)}:{frame.lineno}": stat.size
+        for stat in package.statistics("lineno")[:PROFILE_SITES]
+        for frame in [stat.traceback[0]]
+    }
+
+
+def benchmark(
+    engine: str, mix: str, size: int, repeat: int = 3, profile: bool = False
+) -> BenchmarkResult:
+    """Time and trace one engine on a synthetic program."""
+
+    text = create_program(size, MIXES[mix])
+    tokens = len(tokenize_compact(text))
+    run = ENGINES[engine]
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(text)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = run(text)
+        peak_bytes = tracemalloc.get_traced_memory()[1] - baseline
+        snapshot = tracemalloc.take_snapshot()
+        del result
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+
+    functions = sites = None
+    if profile:
+        functions = _profile_lexer(run, text)
+        sites = _allocation_sites(snapshot)
+
+    return BenchmarkResult(
+        engine=engine,
+        mix=mix,
+        size=size,
+        tokens=tokens,
+        seconds=best,
+        tokens_per_second=tokens / best,
+        peak_bytes=peak_bytes,
+        allocations_per_token=blocks / tokens,
+        profile=functions,
+        allocation_sites=sites,
+    )
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    mixes: Sequence[str] = tuple(MIXES),
+    engines: Sequence[str] = tuple(ENGINES),
+    repeat: int = 3,
+    profile: bool = False,
+) -> Iterator[BenchmarkResult]:
+    """Benchmark every combination of the arguments, yielding each as it completes."""
+    for engine, mix, size in it.product(engines, mixes, sizes):
+        yield benchmark(engine, mix, size, repeat, profile)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmarks and write one JSON object per line."""
+
+    parser = benchmark_parser(__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--mixes", nargs="+", choices=list(MIXES), default=list(MIXES))
+    parser.add_argument(
+        "--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="attribute time to functions with cProfile",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.sizes, args.mixes, args.engines, args.repeat, args.profile
+    )
+    write_results(results, args.output, environment())
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,165 @@
+"""
+Benchmark the clique search engines across word lengths and clique sizes.
+
+Each combination of dictionary, word length, clique size and engine is run
+once with a StageRecorder hooked in (see profiling.py), and one JSON object
+per combination with the duration and counters of every stage is written out
+so engines can be compared with each other and between releases:
+
+    python -m blog_post_code.wordle_cliques.benchmark --lengths 4 5 --sizes 3 \
+        --output results.jsonl
+
+The "real" dictionary is the bundled word list and "synthetic" is a list of
+random lowercase words of each length. Both are filtered with
+get_unique_set_words_of_length_n and then thinned to at most --max-words
+evenly spaced words, which keeps the igraph engine's runs bounded.
+"""
+
+import itertools as it
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import igraph
+import numpy as np
+from numpy.random import default_rng
+
+from blog_post_code.benchmarking import benchmark_parser, environment, write_results
+from blog_post_code.wordle_cliques.cliques import (
+    ALPHABET_SIZE,
+    extract_archive_to_word_list,
+    find_all_size_n_cliques,
+    get_unique_set_words_of_length_n,
+)
+from blog_post_code.wordle_cliques.profiling import StageRecorder, profile_stage
+
+DEFAULT_LENGTHS = (4, 5)
+DEFAULT_SIZES = (2, 3)
+DEFAULT_ENGINES = ("igraph", "bitmask")
+DEFAULT_MAX_WORDS = 400
+SYNTHETIC_WORDS = 50_000
+
+
+@dataclass
+class BenchmarkResult:
+    """One profiled run of an engine on a dictionary."""
+
+    dictionary: str
+    length: int
+    size: int
+    engine: str
+    words: int
+    seconds: float
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+def create_synthetic_words(
+    length: int, count: int = SYNTHETIC_WORDS, seed=0
+) -> List[str]:
+    """Create count random lowercase words of the given length."""
+    rng = default_rng(seed=seed)
+    letters = rng.integers(
+        0, ALPHABET_SIZE, size=(count, length), dtype=np.uint8
+    ) + ord("a")
+    return letters.view(f"S{length}").ravel().astype(str).tolist()
+
+
+def _real_words(length: int) -> List[str]:
+    return list(extract_archive_to_word_list())
+
+
+def _synthetic_words(length: int) -> List[str]:
+    return create_synthetic_words(length)
+
+
+DICTIONARIES: Dict[str, Callable[[int], List[str]]] = {
+    "real": _real_words,
+    "synthetic": _synthetic_words,
+}
+
+
+def benchmark(
+    dictionary: str,
+    length: int,
+    size: int,
+    engine: str,
+    max_words: Optional[int] = DEFAULT_MAX_WORDS,
+    workers: Optional[int] = None,
+) -> BenchmarkResult:
+    """Profile the stages of finding every clique of size words of the given length."""
+
+    stages = StageRecorder()
+    with profile_stage("read", stages) as stage:
+        words = DICTIONARIES[dictionary](length)
+        stage.counters["words"] = len(words)
+
+    with profile_stage("filter", stages) as stage:
+        words = list(words | get_unique_set_words_of_length_n(length))
+        stage.counters["unique_set_words"] = len(words)
+        if max_words is not None and len(words) > max_words:
+            words = words[:: -(-len(words) // max_words)]
+        stage.counters["words"] = len(words)
+
+    for _ in find_all_size_n_cliques(
+        words, size, engine=engine, workers=workers, profile=stages
+    ):
+        pass
+
+    return BenchmarkResult(
+        dictionary=dictionary,
+        length=length,
+        size=size,
+        engine=engine,
+        words=len(words),
+        seconds=sum(stages.seconds().values()),
+        stages={
+            stage.name: {"seconds": stage.seconds, **stage.counters}
+            for stage in stages.stages
+        },
+    )
+
+
+def run_benchmarks(
+    dictionaries: Sequence[str] = tuple(DICTIONARIES),
+    lengths: Sequence[int] = DEFAULT_LENGTHS,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    engines: Sequence[str] = DEFAULT_ENGINES,
+    max_words: Optional[int] = DEFAULT_MAX_WORDS,
+) -> Iterator[BenchmarkResult]:
+    """Benchmark every combination of the arguments, yielding each as it completes."""
+    for dictionary, length, size, engine in it.product(
+        dictionaries, lengths, sizes, engines
+    ):
+        yield benchmark(dictionary, length, size, engine, max_words)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmarks and write one JSON object per line."""
+
+    parser = benchmark_parser(__doc__)
+    parser.add_argument(
+        "--dictionaries",
+        nargs="+",
+        choices=list(DICTIONARIES),
+        default=list(DICTIONARIES),
+    )
+    parser.add_argument("--lengths", type=int, nargs="+", default=DEFAULT_LENGTHS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--engines", nargs="+", choices=DEFAULT_ENGINES, default=DEFAULT_ENGINES
+    )
+    parser.add_argument(
+        "--max-words",
+        type=int,
+        default=DEFAULT_MAX_WORDS,
+        help="thin each dictionary to this",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.dictionaries, args.lengths, args.sizes, args.engines, args.max_words
+    )
+    write_results(results, args.output, environment(igraph=igraph.__version__))
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
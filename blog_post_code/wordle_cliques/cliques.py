@@ -1,18 +1,40 @@
 from __future__ import annotations
 
+import hashlib
 import itertools as it
+import json
+import os
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import jsonlines
+import numpy as np
 from igraph import Graph, plot
+from numpy.typing import NDArray
 from pipe import Pipe
 
+from blog_post_code.caching import content_key, write_entry
+from blog_post_code.wordle_cliques.profiling import ProfileHook, Stage, profile_stage
+
 PARENT_DIR = Path(__file__).parent
 WORDS_ARCHIVE_PATH = PARENT_DIR / "words_alpha.zip"
 WORDS_FILENAME = "words_alpha.txt"
 CLIQUES_PATH = PARENT_DIR / "cliques.jsonl"
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "blog_post_code"
+    / "wordle_cliques"
+)
+# the version of the word data cache layout (see caching.py)
+CACHE_VERSION = 2
+ALPHABET_SIZE = 26
+ADJACENCY_BLOCK_SIZE = 1024
+READ_CHUNK_SIZE = 1 << 24
+_LETTER_BITS = {chr(ord("a") + i): 1 << i for i in range(ALPHABET_SIZE)}
 
 EXAMPLE_WORDS = [
     "burps",
@@ -28,8 +50,7 @@ EXAMPLE_WORDS = [
 
 
 def extract_archive_to_word_list(
-    archive_path: Path = WORDS_ARCHIVE_PATH, 
-    filename: str = WORDS_FILENAME
+    archive_path: Path = WORDS_ARCHIVE_PATH, filename: str = WORDS_FILENAME
 ) -> Iterable[str]:
     """
     Provided a path to a zip archive and the name of the file within the archive
@@ -37,13 +58,31 @@ def extract_archive_to_word_list(
     of the words.
     """
     return (
-        zipfile.ZipFile(archive_path, "r")
-        .read(filename)
-        .decode("utf-8")
-        .splitlines()
+        zipfile.ZipFile(archive_path, "r").read(filename).decode("utf-8").splitlines()
     )
 
 
+def read_archive_chunks(
+    archive_path: Path = WORDS_ARCHIVE_PATH,
+    filename: str = WORDS_FILENAME,
+    chunk_size: int = READ_CHUNK_SIZE,
+) -> Iterable[bytes]:
+    """Read a file within a zip archive in chunks of about chunk_size bytes,
+    each ending at the end of a line."""
+    with zipfile.ZipFile(archive_path, "r") as archive, archive.open(
+        filename
+    ) as member:
+        remainder = b""
+        for chunk in iter(lambda: member.read(chunk_size), b""):
+            chunk = remainder + chunk
+            end = chunk.rfind(b"\n") + 1
+            remainder = chunk[end:]
+            if end:
+                yield chunk[:end]
+        if remainder:
+            yield remainder
+
+
 @Pipe
 def filter_words_of_length_n(words: List[str], n: int) -> Iterable[str]:
     """Filter out words not of length n."""
@@ -57,13 +96,26 @@ def filter_words_with_duplicate_letters(words) -> Iterable[str]:
 
 
 @Pipe
-def filter_duplicate_word_sets(words: Iterable[str]) -> Iterable[str]:
-    """Filter out words with the same set of letters as an already seen word."""
+def filter_duplicate_word_sets(
+    words: Iterable[str], anagrams: Optional[Dict[int, List[str]]] = None
+) -> Iterable[str]:
+    """Filter out words with the same set of letters as an already seen word.
+
+    If an anagrams dict is given, it is filled in as the words go by with
+    each letter mask (see word_to_mask) mapped to every word with that set
+    of letters, the word that was kept first. Words with characters outside
+    a-z have no letter mask and are left out of it."""
 
     seen = set()
     seen_add = seen.add
 
     for word in words:
+        if anagrams is not None and _LETTER_BITS.keys() >= set(word):
+            same_letters = anagrams.setdefault(word_to_mask(word), [])
+            same_letters.append(word)
+            if len(same_letters) == 1:
+                yield word
+            continue
         wordset = frozenset(word)
         if wordset not in seen:
             seen_add(wordset)
@@ -71,15 +123,203 @@ def filter_duplicate_word_sets(words: Iterable[str]) -> Iterable[str]:
 
 
 @Pipe
-def get_unique_set_words_of_length_n(words: Iterable[str], n: int) -> Iterable[str]:
+def filter_unique_set_words(
+    words: Iterable[str],
+    n: int,
+    remove_anagrams: bool = True,
+    anagrams: Optional[Dict[int, List[str]]] = None,
+) -> Iterable[str]:
+    """
+    Filter words in a single pass, keeping words of length n with no
+    repeating letters and (if remove_anagrams) no letter set shared with an
+    already kept word. This is filter_words_of_length_n,
+    filter_words_with_duplicate_letters and filter_duplicate_word_sets fused
+    together, computing the letter mask of each word once.
+
+    The mask is the sum of the bits of the word's letters, which equals
+    their bitwise or exactly when no letter repeats; any repeat carries into
+    another bit and leaves fewer than n bits set. Words with characters
+    outside a-z have no letter mask, so they are compared by their sets of
+    characters as in the chained filters, and are left out of anagrams.
+    """
+    seen: Dict[int, List[str]] = {} if anagrams is None else anagrams
+    seen_sets = set()
+    letter_bit = _LETTER_BITS.__getitem__
+
+    for word in words:
+        if len(word) != n:
+            continue
+        try:
+            mask = sum(map(letter_bit, word))
+        except KeyError:
+            characters = frozenset(word)
+            if len(characters) == n and not (
+                remove_anagrams and characters in seen_sets
+            ):
+                seen_sets.add(characters)
+                yield word
+            continue
+        if bin(mask).count("1") != n:
+            continue
+        if not remove_anagrams:
+            yield word
+            continue
+        same_letters = seen.get(mask)
+        if same_letters is None:
+            seen[mask] = [word]
+            yield word
+        elif anagrams is not None:
+            same_letters.append(word)
+
+
+@Pipe
+def get_unique_set_words_of_length_n(
+    words: Iterable[str], n: int, anagrams: Optional[Dict[int, List[str]]] = None
+) -> Iterable[str]:
     """Get the filtered list of words of length n with no repeating digits,
-    omitting any words with duplicate letter sets."""
-    return (
-        words
-        | filter_words_of_length_n(n)
-        | filter_words_with_duplicate_letters
-        | filter_duplicate_word_sets
+    omitting any words with duplicate letter sets (which are recorded in
+    anagrams, if given; see filter_unique_set_words)."""
+    return words | filter_unique_set_words(n, anagrams=anagrams)
+
+
+def unique_letter_words_from_buffer(
+    data: bytes, n: int
+) -> Tuple[NDArray[np.bytes_], NDArray[np.uint32]]:
+    """
+    Vectorized filter over a buffer of newline separated lowercase words:
+    return the words of length n with no repeating letters (as a bytes
+    array) and their letter masks, in the order they appear in data. Words
+    with characters outside a-z have no letter mask and are skipped.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == ord("\n"))
+    starts = np.concatenate([[0], newlines + 1])
+    ends = np.concatenate([newlines, [len(buffer)]])
+    # drop the carriage returns of \r\n line endings
+    ends -= (ends > starts) & (buffer[np.maximum(ends - 1, 0)] == ord("\r"))
+
+    starts = starts[ends - starts == n]
+    letters = buffer[starts[:, None] + np.arange(n)]
+    offsets = letters.astype(np.int64) - ord("a")
+    lowercase = ((offsets >= 0) & (offsets < ALPHABET_SIZE)).all(axis=1)
+    letters, offsets = letters[lowercase], offsets[lowercase]
+
+    bits = np.left_shift(np.uint32(1), offsets.astype(np.uint32))
+    masks = np.bitwise_or.reduce(bits, axis=1).astype(np.uint32)
+    # as in filter_unique_set_words, the sum and the or agree only without repeats
+    distinct = bits.sum(axis=1, dtype=np.uint32) == masks
+
+    words = np.ascontiguousarray(letters[distinct]).view(f"S{max(n, 1)}").ravel()
+    return words, masks[distinct]
+
+
+def first_unique_masks(masks: NDArray[np.uint32]) -> NDArray[np.int64]:
+    """Return the sorted indices of the first occurrence of each distinct mask."""
+    _, first = np.unique(masks, return_index=True)
+    return np.sort(first)
+
+
+def anagram_index(
+    n: int = 5,
+    archive_path: Path = WORDS_ARCHIVE_PATH,
+    filename: str = WORDS_FILENAME,
+    cache_dir: Optional[Path] = CACHE_DIR,
+) -> Dict[int, List[str]]:
+    """Map the letter mask of every word kept by get_unique_set_words_of_length_n
+    to all of the words of length n with that set of letters, reusing the
+    word data cached by load_word_data."""
+    return load_word_data(
+        n, archive_path, filename, cache_dir=cache_dir
+    ).anagram_index()
+
+
+def expand_anagrams(
+    cliques: Iterable[Dict[int, Tuple[str, ...]]], anagrams: Dict[int, List[str]]
+) -> Iterable[Dict[int, Tuple[str, ...]]]:
+    """
+    Lazily expand each clique into every combination of anagrams of its
+    words, renumbering the positions of the expanded cliques from zero.
+    anagrams is the index filled in by filter_unique_set_words (or from
+    WordData.anagram_index), so the search itself only ever sees one word
+    per set of letters.
+    """
+    expanded = (
+        combination
+        for dct in cliques
+        for clique in dct.values()
+        for combination in anagram_combinations(clique, anagrams)
     )
+    for pos, clique in enumerate(expanded):
+        yield {pos: clique}
+
+
+def anagram_combinations(
+    clique: Sequence[str], anagrams: Dict[int, List[str]]
+) -> Iterable[Tuple[str, ...]]:
+    """Every clique made by replacing the words of clique with their anagrams."""
+    return it.product(*(anagrams[word_to_mask(word)] for word in clique))
+
+
+def word_to_mask(word: str) -> int:
+    """Encode the set of letters in a lowercase word as a 26-bit integer
+    (bit 0 for "a" through bit 25 for "z")."""
+    mask = 0
+    for letter in word:
+        mask |= 1 << (ord(letter) - ord("a"))
+    return mask
+
+
+def words_to_masks(words: Sequence[str]) -> NDArray[np.uint32]:
+    """
+    Encode each lowercase word as a 26-bit letter mask. Words of a single
+    length are encoded in one vectorized pass over their bytes.
+    """
+    lengths = {len(word) for word in words}
+    if len(lengths) != 1:
+        return np.array([word_to_mask(word) for word in words], dtype=np.uint32)
+
+    letters = np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8)
+    offsets = letters.astype(np.int64).reshape(len(words), -1) - ord("a")
+    if offsets.size and (offsets.min() < 0 or offsets.max() >= ALPHABET_SIZE):
+        raise ValueError(
+            "Letter masks can only be made from the lowercase letters a-z."
+        )
+
+    bits = np.left_shift(np.uint32(1), offsets.astype(np.uint32))
+    return np.bitwise_or.reduce(bits, axis=1).astype(np.uint32)
+
+
+def disjoint_adjacency(
+    masks: NDArray[np.uint32], block_size: int = ADJACENCY_BLOCK_SIZE
+) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Build the disjointness graph of a list of letter masks in CSR form.
+
+    Returns (indptr, indices) where indices[indptr[i]:indptr[i + 1]] are the
+    sorted indices j > i whose masks share no letters with mask i. Pairs are
+    tested with (a & b) == 0 over blocks of block_size rows at a time, so the
+    full n by n comparison never has to be held in memory.
+    """
+    n = len(masks)
+    rows, cols = [], []
+
+    for start in range(0, n, block_size):
+        block = masks[start : start + block_size]
+        # only compare against masks at or after the block to get j > i
+        disjoint = (block[:, None] & masks[None, start:]) == 0
+        disjoint &= (
+            np.arange(start, n)[None, :] > np.arange(start, start + len(block))[:, None]
+        )
+        i, j = np.nonzero(disjoint)
+        rows.append(i + start)
+        cols.append(j + start)
+
+    row_indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    indices = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_indices, minlength=n), out=indptr[1:])
+
+    return indptr, indices
 
 
 def create_graph_of_disjoint_words(words: Iterable[str]) -> Graph:
@@ -87,32 +327,591 @@ def create_graph_of_disjoint_words(words: Iterable[str]) -> Graph:
     Create a igraph.Graph where each vertex is a word and two words
     share an edge if they have no letters in common.
 
-    igraph.Graph takes a list of edges as tuples of vertex indices.
-    The edges are created by iterating through each word and adding
-    edges for any remaining words that have disjoint letter sets.
+    Each word is encoded as a 26-bit letter mask and the edges are
+    found with blocked, vectorized (a & b) == 0 tests (see
+    disjoint_adjacency) before being handed to igraph in bulk.
+    """
+    return graph_from_adjacency(*disjoint_adjacency(words_to_masks(list(words))))
+
+
+def graph_from_adjacency(
+    indptr: NDArray[np.int64], indices: NDArray[np.int64]
+) -> Graph:
+    """Create an igraph.Graph from the CSR arrays returned by disjoint_adjacency."""
+    n = len(indptr) - 1
+    sources = np.repeat(np.arange(n), np.diff(indptr))
+
+    graph = Graph(n=n)
+    graph.add_edges(zip(sources.tolist(), indices.tolist()))
+    return graph
+
+
+@dataclass
+class WordData:
+    """
+    A filtered word list together with its letter masks and the CSR arrays
+    of its disjointness graph (see disjoint_adjacency). all_words and
+    all_masks hold every word of the length with no repeated letters,
+    anagrams included, as bytes and masks in word list order.
+    """
+
+    words: List[str]
+    masks: NDArray[np.uint32]
+    indptr: NDArray[np.int64]
+    indices: NDArray[np.int64]
+    all_words: NDArray[np.bytes_]
+    all_masks: NDArray[np.uint32]
+
+    def anagram_index(self) -> Dict[int, List[str]]:
+        """Map each letter mask to every word with that set of letters, in word
+        list order, as filter_unique_set_words does (see expand_anagrams)."""
+        anagrams: Dict[int, List[str]] = {}
+        for mask, word in zip(
+            self.all_masks.tolist(), np.char.decode(self.all_words, "ascii").tolist()
+        ):
+            anagrams.setdefault(mask, []).append(word)
+        return anagrams
+
+
+def _cache_key(archive_path: Path, filename: str, n: int, remove_anagrams: bool) -> str:
+    key = content_key(
+        CACHE_VERSION, Path(archive_path), f"{filename}|{n}|{remove_anagrams}"
+    )
+    return f"words-{n}-{key[:16]}"
+
+
+def load_word_data(
+    n: int = 5,
+    archive_path: Path = WORDS_ARCHIVE_PATH,
+    filename: str = WORDS_FILENAME,
+    remove_anagrams: bool = True,
+    cache_dir: Optional[Path] = CACHE_DIR,
+    profile: Optional[ProfileHook] = None,
+) -> WordData:
+    """
+    Load the words of length n with no repeated letters (and, if
+    remove_anagrams, no two with the same set of letters) along with their
+    masks and disjointness graph.
+
+    Results are cached under cache_dir (by default the user cache directory,
+    $XDG_CACHE_HOME or ~/.cache) as .npy files, keyed by the content hash of
+    the archive, the file name, n and the filter options, so the cache
+    invalidates itself when any input changes. Cached arrays are
+    memory-mapped rather than read into memory. Pass cache_dir=None to skip
+    the cache; one that cannot be written to is skipped as well.
+
+    profile is called with the "cache_load" stage on a cache hit, and
+    otherwise with the "read", "filter", "adjacency" and "cache_write" stages
+    (see profiling.py).
+    """
+    entry = None
+    if cache_dir is not None:
+        entry = Path(cache_dir) / _cache_key(archive_path, filename, n, remove_anagrams)
+        if entry.is_dir():
+            try:
+                return _load_cached_word_data(entry, profile)
+            except OSError:
+                # an unreadable entry is rebuilt (and replaced, if possible) below
+                pass
+
+    # the chunks are filtered as they are read, so each is timed in turn
+    reading, filtering = Stage("read", counters={"bytes": 0}), Stage("filter")
+    chunks = []
+    for buffer in reading.timed(read_archive_chunks(archive_path, filename)):
+        reading.counters["bytes"] += len(buffer)
+        start = time.perf_counter()
+        chunks.append(unique_letter_words_from_buffer(buffer, n))
+        filtering.seconds += time.perf_counter() - start
+
+    start = time.perf_counter()
+    word_bytes = np.concatenate(
+        [chunk_words for chunk_words, _ in chunks] or [np.zeros(0, f"S{max(n, 1)}")]
+    )
+    masks = np.concatenate(
+        [chunk_masks for _, chunk_masks in chunks] or [np.zeros(0, np.uint32)]
+    )
+    filtering.counters["unique_letter_words"] = len(masks)
+    all_words, all_masks = word_bytes, masks
+    if remove_anagrams:
+        keep = first_unique_masks(masks)
+        word_bytes, masks = word_bytes[keep], masks[keep]
+    words = np.char.decode(word_bytes, "ascii").tolist()
+    filtering.counters["words"] = len(words)
+    filtering.seconds += time.perf_counter() - start
+
+    if profile is not None:
+        profile(reading)
+        profile(filtering)
+
+    with profile_stage("adjacency", profile) as stage:
+        indptr, indices = disjoint_adjacency(masks)
+        stage.counters.update(graph_counters(len(words), len(indices)))
+    data = WordData(words, masks, indptr, indices, all_words, all_masks)
+
+    if entry is not None:
+        with profile_stage("cache_write", profile):
+            try:
+                _write_cached_word_data(
+                    entry,
+                    words=word_bytes,
+                    masks=masks,
+                    indptr=indptr,
+                    indices=indices,
+                    all_words=all_words,
+                    all_masks=all_masks,
+                )
+            except OSError:
+                # caching is an optimisation, so an unwritable cache_dir is skipped
+                pass
+
+    return data
+
+
+def _load_cached_word_data(entry: Path, profile: Optional[ProfileHook]) -> WordData:
+    with profile_stage("cache_load", profile) as stage:
+        arrays = {
+            name: np.load(entry / f"{name}.npy", mmap_mode="r")
+            for name in (
+                "words",
+                "masks",
+                "indptr",
+                "indices",
+                "all_words",
+                "all_masks",
+            )
+        }
+        data = WordData(
+            words=np.char.decode(arrays.pop("words"), "ascii").tolist(), **arrays
+        )
+        stage.counters.update(words=len(data.words), edges=len(data.indices))
+    return data
+
+
+def _write_cached_word_data(entry: Path, **arrays: NDArray) -> None:
+    def write(staging: Path) -> None:
+        for name, array in arrays.items():
+            np.save(staging / f"{name}.npy", array)
+
+    write_entry(entry, write, directory=True)
+
+
+def graph_counters(vertices: int, edges: int) -> Dict[str, float]:
+    """Counters describing the size and density of a disjointness graph."""
+    pairs = vertices * (vertices - 1) // 2
+    return {
+        "vertices": vertices,
+        "edges": edges,
+        "density": edges / pairs if pairs else 0.0,
+    }
+
+
+def letter_frequency_order(masks: NDArray[np.uint32]) -> NDArray[np.int64]:
+    """Return the letters (0 for "a" through 25 for "z") ordered from the
+    fewest words containing them to the most."""
+    bits = (masks[:, None] >> np.arange(ALPHABET_SIZE, dtype=np.uint32)) & 1
+    return np.argsort(bits.sum(axis=0), kind="stable")
+
+
+@dataclass
+class SearchStats:
+    """
+    Counters from a MaskCliqueSearch: nodes is the number of partial cliques
+    visited and prunes the number of times a branch was abandoned because it
+    had skipped as many letters as a clique can leave uncovered.
+    """
+
+    nodes: int = 0
+    prunes: int = 0
+
+    def add(self, other: "SearchStats") -> None:
+        """Add the counters of other (e.g. from a worker process) to these."""
+        self.nodes += other.nodes
+        self.prunes += other.prunes
+
+
+class MaskCliqueSearch:
+    """
+    Search for sets of size letter masks with no letters in common.
+
+    The search keeps a running mask of used letters and walks the alphabet
+    from the rarest letter to the most common. Every word is filed under its
+    rarest letter, so at each step the first uncovered letter is either
+    covered by a word filed under it or left out of the clique for good.
+    A clique of size words of n letters leaves 26 - size * n letters
+    uncovered, and a branch is pruned as soon as it has skipped more letters
+    than that. Nodes visited and prunes are counted in self.stats.
     """
-    wordsets = list(map(set, words))
-    edges = [
-        (i, j)
-        for i, left in enumerate(wordsets)
-        for j, right in it.islice(enumerate(wordsets), i + 1, None)
-        if left.isdisjoint(right)
-    ]
 
-    return Graph(edges=edges)
+    def __init__(self, masks: NDArray[np.uint32], size: int) -> None:
+        self.size = size
+        self.stats = SearchStats()
+        self.max_skips = -1
+        self.group_indices: List[NDArray[np.int64]] = []
+        self.group_masks: List[NDArray[np.uint32]] = []
+
+        if size <= 0 or len(masks) == 0:
+            return
+
+        order = letter_frequency_order(masks)
+        rank = np.empty(ALPHABET_SIZE, dtype=np.int64)
+        rank[order] = np.arange(ALPHABET_SIZE)
+
+        bits = (masks[:, None] >> np.arange(ALPHABET_SIZE, dtype=np.uint32)) & 1
+        self.max_skips = ALPHABET_SIZE - size * int(bits.sum(axis=1).min())
+
+        # the position in the rarest-first order of each word's rarest letter
+        rarest = np.where(bits == 1, rank[None, :], ALPHABET_SIZE).min(axis=1)
+        self.group_indices = [
+            np.flatnonzero(rarest == position) for position in range(ALPHABET_SIZE)
+        ]
+        self.group_masks = [masks[indices] for indices in self.group_indices]
+        self.letter_bits = [1 << int(letter) for letter in order]
+
+    def branches(self) -> List[Tuple[int, int, int]]:
+        """
+        Split the search by its first word, returning (position, index, mask)
+        for every word that can start a clique. Searching the branches in
+        order yields the cliques in the same order as search().
+        """
+        return [
+            (position, idx, mask)
+            for position in range(min(self.max_skips + 1, len(self.group_indices)))
+            for idx, mask in zip(
+                self.group_indices[position].tolist(),
+                self.group_masks[position].tolist(),
+            )
+        ]
+
+    def search_branch(self, branch: Tuple[int, int, int]) -> List[Tuple[int, ...]]:
+        """Return every clique whose first word is the given branch."""
+        position, idx, mask = branch
+        return list(self.search(mask, position + 1, position, [idx]))
+
+    def search(
+        self,
+        used: int = 0,
+        position: int = 0,
+        skips: int = 0,
+        chosen: Optional[List[int]] = None,
+    ) -> Iterable[Tuple[int, ...]]:
+        """Yield each clique extending chosen as a sorted tuple of mask indices."""
+        chosen = [] if chosen is None else chosen
+        if self.max_skips < 0:
+            return
+        self.stats.nodes += 1
+        if len(chosen) == self.size:
+            yield tuple(sorted(chosen))
+            return
+
+        for position in range(position, ALPHABET_SIZE):
+            if used & self.letter_bits[position]:
+                continue
+
+            candidates = self.group_masks[position]
+            fits = (candidates & used) == 0
+            for idx, mask in zip(
+                self.group_indices[position][fits].tolist(), candidates[fits].tolist()
+            ):
+                chosen.append(idx)
+                yield from self.search(used | mask, position + 1, skips, chosen)
+                chosen.pop()
+
+            # leave this letter uncovered, if the clique can still afford it
+            if skips == self.max_skips:
+                self.stats.prunes += 1
+                return
+            skips += 1
+
+
+# the search each clique worker process builds once in _init_clique_worker
+_WORKER_SEARCH: Optional[MaskCliqueSearch] = None
+
+
+def _init_clique_worker(masks: NDArray[np.uint32], size: int) -> None:
+    global _WORKER_SEARCH
+    _WORKER_SEARCH = MaskCliqueSearch(masks, size)
+
+
+def _search_clique_branch(
+    branch: Tuple[int, int, int]
+) -> Tuple[List[Tuple[int, ...]], SearchStats]:
+    assert _WORKER_SEARCH is not None
+    _WORKER_SEARCH.stats = SearchStats()
+    return _WORKER_SEARCH.search_branch(branch), _WORKER_SEARCH.stats
+
+
+def find_disjoint_mask_cliques(
+    masks: NDArray[np.uint32],
+    size: int,
+    workers: Optional[int] = None,
+    chunksize: int = 4,
+    stats: Optional[SearchStats] = None,
+) -> Iterable[Tuple[int, ...]]:
+    """
+    Find every set of size masks with no letters in common, yielding each as
+    a sorted tuple of indices into masks (see MaskCliqueSearch).
+
+    With more than one worker the search is split by first word and the
+    branches are handed to a process pool chunksize at a time, so idle workers
+    keep picking up the remaining branches. Results are merged back in branch
+    order, which makes the output identical to the single process search.
+
+    stats, if given, accumulates the search counters of every process.
+    """
+    search = MaskCliqueSearch(masks, size)
+    if stats is not None:
+        search.stats = stats
+    if not workers or workers == 1:
+        yield from search.search()
+        return
+
+    for cliques in search_branches(
+        search, search.branches(), masks, workers, chunksize
+    ):
+        yield from cliques
+
+
+def search_branches(
+    search: MaskCliqueSearch,
+    branches: Sequence[Tuple[int, int, int]],
+    masks: NDArray[np.uint32],
+    workers: Optional[int] = None,
+    chunksize: int = 4,
+) -> Iterable[List[Tuple[int, ...]]]:
+    """Yield the cliques of each branch in turn, searching them in a process
+    pool of workers (built from masks) when there is more than one worker.
+    The workers' counters are added to search.stats."""
+    if not workers or workers == 1:
+        yield from map(search.search_branch, branches)
+        return
+
+    with ProcessPoolExecutor(
+        workers, initializer=_init_clique_worker, initargs=(masks, search.size)
+    ) as pool:
+        for cliques, stats in pool.map(
+            _search_clique_branch, branches, chunksize=chunksize
+        ):
+            search.stats.add(stats)
+            yield cliques
+
+
+def search_counters(
+    cliques: int, seconds: float, stats: Optional[SearchStats] = None
+) -> Dict[str, float]:
+    """Counters describing a clique search, with the bitmask engine's stats if given."""
+    counters: Dict[str, float] = {
+        "cliques": cliques,
+        "cliques_per_second": cliques / seconds if seconds else 0.0,
+    }
+    if stats is not None:
+        counters.update(nodes=stats.nodes, prunes=stats.prunes)
+    return counters
+
+
+def _write_checkpoint(checkpoint_path: Path, state: Dict[str, object]) -> None:
+    """Atomically replace the checkpoint file with state."""
+    staging = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    staging.write_text(json.dumps(state))
+    os.replace(staging, checkpoint_path)
+
+
+def write_cliques(
+    words: Sequence[str],
+    size: int,
+    cliques_path: Path = CLIQUES_PATH,
+    checkpoint_path: Optional[Path] = None,
+    binary_path: Optional[Path] = None,
+    batch_size: int = 1000,
+    workers: Optional[int] = None,
+    anagrams: Optional[Dict[int, List[str]]] = None,
+    profile: Optional[ProfileHook] = None,
+) -> int:
+    """
+    Find every clique of size words with the bitmask engine and stream them
+    to cliques_path as JSONL, in the same {position: words} form as main().
+    Returns the number of cliques written.
+
+    Cliques are written in batches of at least batch_size, each followed by
+    a checkpoint recording the completed top-level branches of the search
+    and the size of the output files. If checkpoint_path already exists the
+    run resumes from it: the outputs are truncated back to the checkpoint
+    and the completed branches are skipped. A ValueError is raised if an
+    output is missing or shorter than the checkpoint records.
+
+    binary_path, if given, also receives every clique as size little-endian
+    uint32 indices into words (see read_binary_cliques).
+
+    With an anagrams index (see WordData.anagram_index) every clique is
+    written to cliques_path once for each combination of anagrams of its
+    words, as with expand_anagrams; binary_path still receives the cliques
+    as found, and the number returned counts the expanded cliques.
+
+    profile is called with a "search" stage covering the search of the
+    remaining branches (see search_counters) and a "write" stage.
+    """
+    words = list(words)
+    masks = words_to_masks(words)
+    search = MaskCliqueSearch(masks, size)
+    branches = search.branches()
+
+    state: Dict[str, object] = {
+        "size": size,
+        "words": hashlib.sha256("\n".join(words).encode()).hexdigest(),
+        "expanded": anagrams is not None,
+        "branches": 0,
+        "cliques": 0,
+        "jsonl_bytes": 0,
+        "binary_bytes": 0,
+    }
+    if checkpoint_path is not None and Path(checkpoint_path).exists():
+        saved = json.loads(Path(checkpoint_path).read_text())
+        identity = (state["size"], state["words"], state["expanded"])
+        if (saved["size"], saved["words"], saved.get("expanded", False)) != identity:
+            raise ValueError(f"{checkpoint_path} was written for a different search.")
+        state = saved
+
+    outputs = [(cliques_path, "jsonl_bytes")]
+    if binary_path is not None:
+        outputs.append((binary_path, "binary_bytes"))
+
+    resuming = bool(state["branches"])
+    for path, key in outputs:
+        if resuming and (
+            not Path(path).exists() or Path(path).stat().st_size < state[key]
+        ):
+            raise ValueError(
+                f"{path} is missing or shorter than recorded in {checkpoint_path}, "
+                "so the run cannot be resumed."
+            )
+
+    files = {}
+    for path, key in outputs:
+        file = open(path, "r+b" if resuming else "wb")
+        file.truncate(state[key])
+        file.seek(state[key])
+        files[key] = file
+
+    try:
+        writer = jsonlines.Writer(files["jsonl_bytes"])
+        batch: List[Tuple[int, ...]] = []
+        done = int(state["branches"])
+        searching, writing = Stage("search"), Stage("write")
+        found = 0
+
+        def flush() -> None:
+            start = time.perf_counter()
+            position = int(state["cliques"])
+            named = [tuple(words[idx] for idx in clique) for clique in batch]
+            if anagrams is not None:
+                named = [
+                    combination
+                    for clique in named
+                    for combination in anagram_combinations(clique, anagrams)
+                ]
+            writer.write_all(
+                {position + offset: clique} for offset, clique in enumerate(named)
+            )
+            if binary_path is not None:
+                files["binary_bytes"].write(
+                    np.array(batch, dtype="<u4").reshape(-1, size).tobytes()
+                )
+
+            for key, file in files.items():
+                file.flush()
+                os.fsync(file.fileno())
+                state[key] = file.tell()
+            state["cliques"] = position + len(named)
+            state["branches"] = done
+            if checkpoint_path is not None:
+                _write_checkpoint(Path(checkpoint_path), state)
+            batch.clear()
+            writing.seconds += time.perf_counter() - start
+
+        for done, cliques in enumerate(
+            searching.timed(search_branches(search, branches[done:], masks, workers)),
+            start=done + 1,
+        ):
+            found += len(cliques)
+            batch.extend(cliques)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        for file in files.values():
+            file.close()
+
+    if profile is not None:
+        searching.counters.update(
+            search_counters(found, searching.seconds, search.stats)
+        )
+        writing.counters["bytes"] = int(state["jsonl_bytes"]) + int(
+            state["binary_bytes"]
+        )
+        profile(searching)
+        profile(writing)
+
+    return int(state["cliques"])
+
+
+def read_binary_cliques(binary_path: Path, size: int) -> NDArray[np.uint32]:
+    """Memory-map a binary clique file from write_cliques as a (cliques, size) array."""
+    return np.memmap(binary_path, dtype="<u4", mode="r").reshape(-1, size)
 
 
 def find_all_size_n_cliques(
-    words: Iterable[str], size: int
+    words: Iterable[str],
+    size: int,
+    engine: str = "igraph",
+    workers: Optional[int] = None,
+    adjacency: Optional[Tuple[NDArray[np.int64], NDArray[np.int64]]] = None,
+    profile: Optional[ProfileHook] = None,
 ) -> Iterable[Dict[int, Tuple[str, ...]]]:
     """Provided an iterable of strings, return all of the sets of words
-    of a given size with no overlapping letters between any pair in the set."""
-    _words = list(words)
+    of a given size with no overlapping letters between any pair in the set.
 
-    graph = create_graph_of_disjoint_words(_words)
+    The "igraph" engine searches the graph of disjoint words with
+    igraph.Graph.cliques. The "bitmask" engine (see find_disjoint_mask_cliques)
+    finds the same cliques much faster, though in a different order, and
+    can spread the search over a pool of worker processes while keeping
+    that order (and so the positional keys) the same from run to run.
 
-    for pos, clique in enumerate(graph.cliques(size, size)):
-        yield {pos: tuple(_words[idx] for idx in clique)}
+    adjacency, the CSR arrays of the disjointness graph (e.g. from
+    load_word_data), saves the igraph engine from recomputing them.
+
+    profile is called with a "graph" stage when the igraph engine builds its
+    graph and a "search" stage once the cliques are exhausted, timing only
+    the search itself and not the consumer of the cliques."""
+    _words = list(words)
+    stats = None
+
+    if engine == "igraph":
+        if workers and workers > 1:
+            raise ValueError("The igraph engine runs in a single process.")
+        with profile_stage("graph", profile) as stage:
+            if adjacency is None:
+                adjacency = disjoint_adjacency(words_to_masks(_words))
+            graph = graph_from_adjacency(*adjacency)
+            stage.counters.update(graph_counters(graph.vcount(), graph.ecount()))
+
+        def igraph_cliques() -> Iterable[Tuple[int, ...]]:
+            # deferred so that the search stage is charged for graph.cliques
+            yield from graph.cliques(size, size)
+
+        cliques = igraph_cliques()
+    elif engine == "bitmask":
+        stats = SearchStats()
+        cliques = find_disjoint_mask_cliques(
+            words_to_masks(_words), size, workers, stats=stats
+        )
+    else:
+        raise ValueError(f"Unknown engine {engine!r}, expected 'igraph' or 'bitmask'.")
+
+    with profile_stage("search", profile, timed=False) as stage:
+        found = 0
+        for pos, clique in enumerate(stage.timed(cliques)):
+            found += 1
+            yield {pos: tuple(_words[idx] for idx in clique)}
+        stage.counters.update(search_counters(found, stage.seconds, stats))
 
 
 def plot_example_cliques(filename: str):
@@ -137,27 +936,66 @@ def main(
     words_archive_path: Path = WORDS_ARCHIVE_PATH,
     words_filename: str = WORDS_FILENAME,
     cliques_path: Path = CLIQUES_PATH,
+    cache_dir: Optional[Path] = CACHE_DIR,
+    engine: str = "igraph",
+    checkpoint_path: Optional[Path] = None,
+    expand: bool = False,
+    workers: Optional[int] = None,
+    profile: Optional[ProfileHook] = None,
 ):
     """
     Load a list of words from a file (filename: word_filename)
     within a zip archive (words_archive_path). Save a file with
     all of the cliques (of mutually exlusive letters) to cliques_path.
+    The filtered words and their graph are cached in cache_dir.
+    With the "bitmask" engine the cliques are streamed to cliques_path
+    and an interrupted run resumes from checkpoint_path (see write_cliques),
+    searching in a pool of workers processes if workers is more than one.
+    With expand, every clique is also written out with each combination of
+    anagrams of its words (see expand_anagrams), using the anagram index
+    kept by load_word_data.
+    profile is called as each stage finishes (see profiling.py).
     """
 
-    words = extract_archive_to_word_list(
-        words_archive_path, words_filename
-    ) | get_unique_set_words_of_length_n(5)
+    data = load_word_data(
+        5, words_archive_path, words_filename, cache_dir=cache_dir, profile=profile
+    )
+
+    anagrams = data.anagram_index() if expand else None
+
+    if engine == "bitmask":
+        write_cliques(
+            data.words,
+            5,
+            cliques_path,
+            checkpoint_path,
+            workers=workers,
+            anagrams=anagrams,
+            profile=profile,
+        )
+        return
+
+    five_cliques = find_all_size_n_cliques(
+        data.words,
+        5,
+        workers=workers,
+        adjacency=(data.indptr, data.indices),
+        profile=profile,
+    )
 
-    five_cliques = find_all_size_n_cliques(words, 5)
+    if anagrams is not None:
+        five_cliques = expand_anagrams(five_cliques, anagrams)
 
     with jsonlines.open(cliques_path, "w") as writer:
         writer.write_all(five_cliques)
 
 
 if __name__ == "__main__":
-    import time
+    from blog_post_code.wordle_cliques.profiling import StageRecorder
 
+    stages = StageRecorder()
     start = time.perf_counter()
-    main()
+    main(profile=stages)
     end = time.perf_counter()
+    print(stages.summary())
     print(end - start)
@@ -0,0 +1,91 @@
+"""
+Time the stages of finding word cliques and count what each stage did.
+
+Functions in cliques.py that take a profile hook call it once for each stage
+they finish (reading the archive, filtering, building the graph, searching and
+so on) with a Stage holding its name, the seconds spent in it and stage
+specific counters such as the number of words kept, graph edges and density,
+or search nodes, prunes and cliques per second:
+
+    stages = StageRecorder()
+    main(profile=stages)
+    print(stages.summary())
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Stage:
+    """The name, duration and counters of one finished stage."""
+
+    name: str
+    seconds: float = 0.0
+    counters: Dict[str, float] = field(default_factory=dict)
+
+    def timed(self, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Pass through iterable, adding only the time spent producing each item
+        to the stage, so a lazy stage is not charged for its consumer's work.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds += time.perf_counter() - start
+            yield item
+
+
+ProfileHook = Callable[[Stage], None]
+
+
+@contextmanager
+def profile_stage(
+    name: str, hook: Optional[ProfileHook], timed: bool = True
+) -> Iterator[Stage]:
+    """
+    Record a stage over the body of the with block and hand it to hook when
+    the block finishes. With timed=False the block's own duration is not
+    added, for stages timed piecewise with Stage.timed instead.
+    """
+    stage = Stage(name)
+    start = time.perf_counter()
+    yield stage
+    if timed:
+        stage.seconds += time.perf_counter() - start
+    if hook is not None:
+        hook(stage)
+
+
+class StageRecorder:
+    """A profile hook that keeps every stage it is called with."""
+
+    def __init__(self) -> None:
+        self.stages: List[Stage] = []
+
+    def __call__(self, stage: Stage) -> None:
+        self.stages.append(stage)
+
+    def seconds(self) -> Dict[str, float]:
+        """Total seconds spent in each stage, by stage name."""
+        totals: Dict[str, float] = {}
+        for stage in self.stages:
+            totals[stage.name] = totals.get(stage.name, 0.0) + stage.seconds
+        return totals
+
+    def summary(self) -> str:
+        """One line per stage with its duration and counters."""
+        return "\n".join(
+            f"{stage.name:<12}{stage.seconds:10.3f}s  "
+            + "  ".join(f"{key}={value:.6g}" for key, value in stage.counters.items())
+            for stage in self.stages
+        )
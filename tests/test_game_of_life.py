@@ -1,12 +1,40 @@
+import itertools as it
+
 import numpy as np
 import pytest
 
 from blog_post_code.game_of_life.conway import (
+    PLAINTEXT_GLIDER,
+    convert_plaintext,
     create_random_grid,
     count_neighbors,
     count_neighbors_np,
     simulate,
+    BOUNDARY_MODES,
+)
+from blog_post_code.game_of_life import patterns
+from blog_post_code.game_of_life.benchmark import BACKENDS, benchmark, run_benchmarks
+from blog_post_code.game_of_life.bitpacked import pack_grid, unpack_grid
+from blog_post_code.game_of_life.cycles import CycleDetector, generation_n
+from blog_post_code.game_of_life.ensemble import (
+    create_random_ensemble,
+    simulate_ensemble,
+)
+from blog_post_code.game_of_life.hashlife import HashLife
+from blog_post_code.game_of_life.parallel import simulate_parallel
+from blog_post_code.game_of_life.patterns import (
+    load_snapshot,
+    parse_life106,
+    parse_plaintext,
+    parse_rle,
+    save_snapshot,
+    to_life106,
+    to_plaintext,
+    to_rle,
 )
+from blog_post_code.game_of_life.render import GifWriter, write_gif
+from blog_post_code.game_of_life.rules import HIGHLIFE, Rule
+from blog_post_code.game_of_life.sparse import SparseSimulation
 
 
 @pytest.fixture(scope="module")
@@ -70,3 +98,267 @@ def test_all_3_neighbor_cells_alive(second_grid, neighbors):
 def test_all_non_2_or_3_neighbor_cells_dead(second_grid, neighbors):
     """Confirm that there are no cases where a cell without 2 or 3 neighbors is alive"""
     assert not np.any(second_grid[np.bool_(((neighbors != 3) & (neighbors != 2)))])
+
+
+@pytest.mark.parametrize("shape", [(10, 10), (33, 130), (64, 64)])
+def test_bitpacked_backend_matches_dense(shape):
+    """Confirm that the bit-packed engine steps like the dense one."""
+    grid = create_random_grid(*shape, seed=7)
+    dense = simulate(grid)
+    packed = simulate(grid, backend="bitpacked")
+    for _ in range(20):
+        assert np.array_equal(next(dense), next(packed))
+
+
+def test_pack_roundtrip():
+    grid = create_random_grid(5, 70, seed=1)
+    assert np.array_equal(unpack_grid(pack_grid(grid), 70), grid)
+
+
+@pytest.mark.parametrize("generations", [1, 5, 64, 150])
+def test_hashlife_matches_dense(generations):
+    """Confirm that HashLife jumps to the same board as stepping one generation at a
+    time, padding the grid so that nothing reaches the edge."""
+    grid = np.pad(convert_plaintext(PLAINTEXT_GLIDER), 80)
+    expected = next(it.islice(simulate(grid), generations - 1, None))
+
+    life = HashLife(grid)
+    life.advance(generations)
+
+    assert life.generation == generations
+    assert np.array_equal(life.to_array(), expected)
+
+
+def test_hashlife_cache_is_capped():
+    life = HashLife(create_random_grid(32, 32, seed=5), max_cache_size=500)
+    life.advance(100)
+    assert life.cache_size <= 500
+
+
+@pytest.mark.parametrize("dense_threshold", [0.5, 1.0])
+def test_sparse_simulation_matches_dense(dense_threshold):
+    """Confirm that sparse stepping yields the same grids as simulate, both with
+    the dense fallback and when every generation is stepped tile by tile."""
+    grid = np.pad(create_random_grid(40, 40, seed=11), 60)
+    sparse = SparseSimulation(grid, tile_size=16, dense_threshold=dense_threshold)
+
+    for expected, actual in it.islice(zip(simulate(grid), sparse), 60):
+        assert np.array_equal(expected, actual)
+
+    assert len(sparse.active_tile_counts) == 60
+    assert sparse.active_tile_counts[-1] < sparse.tiles_shape[0] * sparse.tiles_shape[1]
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_parallel_simulation_matches_dense(executor):
+    """Confirm that stepping strips in a worker pool gives the grids of simulate."""
+    grid = create_random_grid(50, 70, seed=13)
+    generations = simulate_parallel(grid, workers=3, executor=executor)
+
+    for expected, actual in it.islice(zip(simulate(grid), generations), 20):
+        assert np.array_equal(expected, actual)
+
+    generations.close()
+
+
+@pytest.mark.parametrize("boundary", list(BOUNDARY_MODES))
+def test_np_and_scipy_count_methods_share_boundaries(starting_grid, boundary):
+    assert np.all(
+        count_neighbors(starting_grid, boundary)
+        == count_neighbors_np(starting_grid, boundary)
+    )
+
+
+@pytest.mark.parametrize("notation", ["B3/S23", "B36/S23", "B2/S", "B3678/S34678"])
+def test_rule_table_matches_notation(starting_grid, neighbors, notation):
+    """Confirm that the lookup table agrees with the birth and survival sets."""
+    rule = Rule.parse(notation)
+    expected = np.where(
+        starting_grid == 1,
+        np.isin(neighbors, list(rule.survival)),
+        np.isin(neighbors, list(rule.birth)),
+    )
+
+    assert str(rule) == notation
+    assert np.array_equal(rule.apply(starting_grid, neighbors), expected)
+    assert Rule.parse("S23/B36") == HIGHLIFE
+
+
+def test_toroidal_glider_wraps_around():
+    """A glider on a torus returns to where it started after 4 * width generations."""
+    grid = np.zeros((8, 8), dtype=int)
+    grid[:3, :3] = convert_plaintext(".O.\n..O\nOOO")
+
+    final = next(it.islice(simulate(grid, boundary="toroidal"), 31, None))
+    assert np.array_equal(final, grid)
+
+
+def test_ensemble_matches_individual_simulations():
+    """Confirm that stepping a stack of boards together gives the same populations,
+    extinction generations and final boards as simulating each board on its own."""
+    stack = create_random_ensemble(40, 8, 8, seed=17)
+    result = simulate_ensemble(stack, 30)
+
+    for board, populations, extinct_at, final in zip(
+        stack, result.populations.T, result.extinct_at, result.final
+    ):
+        frames = [board, *it.islice(simulate(board.astype(int)), 30)]
+        expected = [frame.sum() for frame in frames]
+
+        assert list(populations) == expected
+        assert extinct_at == next((g for g, p in enumerate(expected) if p == 0), -1)
+        assert np.array_equal(final, frames[-1])
+
+
+def test_cycle_detection_and_extrapolation():
+    """Confirm that the detected cycle really repeats and that extrapolating past it
+    gives the same board as simulating every generation."""
+    grid = create_random_grid(12, 12, seed=10)
+    frames = [grid, *it.islice(simulate(grid), 200)]
+
+    detector = CycleDetector(grid)
+    watched = list(detector.watch(simulate(grid)))
+    cycle = detector.cycle
+
+    assert cycle is not None
+    assert len(watched) == cycle.transient + cycle.period
+    assert np.array_equal(
+        frames[cycle.transient], frames[cycle.transient + cycle.period]
+    )
+
+    for n in (0, 3, cycle.transient + 1, 199, 200):
+        assert np.array_equal(generation_n(grid, n), frames[n])
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_streamed_gif_frames_match_simulation(tmp_path, compress):
+    """Decode the streamed gif and confirm that each frame shows its generation."""
+    Image = pytest.importorskip("PIL.Image")
+    grid = create_random_grid(30, 40, seed=21)
+    path = tmp_path / "conway.gif"
+
+    assert write_gif(simulate(grid), path, nframes=15, scale=3, compress=compress) == 15
+
+    with Image.open(path) as image:
+        for frame_number, expected in enumerate(it.islice(simulate(grid), 15)):
+            image.seek(frame_number)
+            live = np.array(image.convert("L"))[::3, ::3] == 0
+            assert np.array_equal(live, expected == 1)
+
+
+def test_gif_writer_checks_arguments_before_opening(tmp_path):
+    path = tmp_path / "board.gif"
+    with pytest.raises(ValueError):
+        GifWriter(path, (10_000, 10), scale=8)
+    with pytest.raises(ValueError):
+        GifWriter(path, (10, 10), palette=[(0, 0, 0)] * 129)
+    assert not path.exists()
+
+
+def test_plaintext_empty_lines_are_dead_rows():
+    expected = np.array([[0, 1, 0], [0, 0, 0], [1, 0, 1]])
+    assert np.array_equal(parse_plaintext("!Name: gap\n.O\n\nO.O"), expected)
+
+
+def test_rle_parsing():
+    glider = "#N Glider\nx = 3, y = 3, rule = B3/S23\nbob$2bo$\n3o!"
+    assert np.array_equal(parse_rle(glider), convert_plaintext(".O.\n..O\nOOO"))
+
+
+@pytest.mark.parametrize(
+    ("writer", "parser"),
+    [(to_plaintext, parse_plaintext), (to_rle, parse_rle), (to_life106, parse_life106)],
+)
+def test_pattern_formats_round_trip(writer, parser):
+    grid = np.pad(convert_plaintext(PLAINTEXT_GLIDER), ((0, 2), (0, 0)))
+    if parser is parse_life106:
+        # Life 1.06 only records live cells, so the pattern is cropped to them
+        grid = grid[:-2]
+    assert np.array_equal(parser(writer(grid)), grid)
+
+
+def test_snapshot_resumes_simulation(tmp_path):
+    grid = create_random_grid(37, 90, seed=23)
+    save_snapshot(grid, tmp_path / "board.snap", generation=4, chunk_rows=10)
+
+    snapshot = load_snapshot(tmp_path / "board.snap")
+    assert isinstance(snapshot.packed, np.memmap)
+    assert snapshot.generation == 4
+    assert np.array_equal(snapshot.to_grid(), grid)
+
+    for expected, packed in it.islice(
+        zip(simulate(grid), snapshot.resume(chunk_rows=8)), 10
+    ):
+        assert packed is snapshot.packed
+        assert np.array_equal(expected, unpack_grid(packed, snapshot.width))
+    assert snapshot.generation == 14
+    # the read-only snapshot is stepped into a temporary file, not its own
+    assert np.array_equal(load_snapshot(tmp_path / "board.snap").to_grid(), grid)
+
+
+def test_writable_snapshot_steps_in_file(tmp_path):
+    grid = create_random_grid(37, 90, seed=29)
+    save_snapshot(grid, tmp_path / "board.snap")
+
+    snapshot = load_snapshot(tmp_path / "board.snap", writable=True)
+    expected = next(it.islice(simulate(grid), 4, None))
+    for _ in it.islice(snapshot.resume(chunk_rows=5), 5):
+        pass
+
+    saved = load_snapshot(tmp_path / "board.snap")
+    assert saved.generation == 5
+    assert np.array_equal(saved.to_grid(), expected)
+    assert [path.name for path in tmp_path.iterdir()] == ["board.snap"]
+
+
+def test_interrupted_snapshot_keeps_last_generation(tmp_path, monkeypatch):
+    """Stop a writable resume part way through a generation, then confirm that
+    the file still holds the last complete generation with its header."""
+    grid = create_random_grid(37, 90, seed=31)
+    save_snapshot(grid, tmp_path / "board.snap")
+    first = next(simulate(grid))
+
+    original = patterns.step_packed_chunks
+
+    def interrupted(packed, width, chunk_rows):
+        for number, chunk in enumerate(original(packed, width, chunk_rows)):
+            if number == 2:
+                raise KeyboardInterrupt
+            yield chunk
+
+    snapshot = load_snapshot(tmp_path / "board.snap", writable=True)
+    generations = snapshot.resume(chunk_rows=5)
+    next(generations)
+    monkeypatch.setattr(patterns, "step_packed_chunks", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        next(generations)
+
+    saved = load_snapshot(tmp_path / "board.snap")
+    assert saved.generation == snapshot.generation == 1
+    assert np.array_equal(saved.to_grid(), first)
+    assert [path.name for path in tmp_path.iterdir()] == ["board.snap"]
+
+
+def test_benchmarks_cover_every_backend():
+    results = list(
+        run_benchmarks(
+            sizes=[16], densities=[0.5], generations=2, repeat=1, max_memory=2**20
+        )
+    )
+
+    assert {result.backend for result in results} == set(BACKENDS)
+    assert all(result.cells_per_second > 0 for result in results if not result.skipped)
+    assert all(
+        result.peak_bytes >= result.peak_bytes_per_generation
+        for result in results
+        if not result.skipped
+    )
+    # HashLife keeps the nodes of every generation in its cache
+    (hashlife,) = [result for result in results if result.backend == "hashlife"]
+    assert hashlife.allocations_per_generation > 0
+
+
+def test_benchmark_checks_its_arguments():
+    assert benchmark("dense", 16, 0.5, "uint8", generations=0, repeat=1).peak_bytes >= 0
+    with pytest.raises(ValueError):
+        benchmark("dense", 16, 0.5, "bool", generations=2, repeat=1)
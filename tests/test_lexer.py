@@ -0,0 +1,286 @@
+import io
+import json
+import pickle
+
+import numpy as np
+import pytest
+from blog_post_code.lexer import (
+    IncrementalLexer,
+    Lexer,
+    LineIndex,
+    Span,
+    Token,
+    lex_batch,
+    tokenize,
+    tokenize_compact,
+    tokenize_file,
+    tokenize_stream,
+)
+from blog_post_code.lexer import benchmark
+from blog_post_code.lexer._scanner import TOKEN_KINDS
+
+PROGRAM = """let five = 5;
+let ten = 10;
+
+let add = fn(x, y) {
+    x + y;
+};
+
+let result = add(five, ten);
+!-/*5;
+5 < 10 > 5;
+
+if (5 < 10) {
+    return true;
+} else {
+    return false;
+}
+
+10 == 10;
+10 != 9;
+"""
+
+
+def test_lexer():
+    tokens = list(Lexer("let add = fn(x, y) { x + y; }; 10 != 9 == !x;"))
+    assert tokens == [
+        Token.Let(),
+        Token.Ident("add"),
+        Token.Assign(),
+        Token.Function(),
+        Token.Lparen(),
+        Token.Ident("x"),
+        Token.Comma(),
+        Token.Ident("y"),
+        Token.Rparen(),
+        Token.LSquirly(),
+        Token.Ident("x"),
+        Token.Plus(),
+        Token.Ident("y"),
+        Token.Semicolon(),
+        Token.RSquirly(),
+        Token.Semicolon(),
+        Token.Int("10"),
+        Token.NotEqual(),
+        Token.Int("9"),
+        Token.Equal(),
+        Token.Bang(),
+        Token.Ident("x"),
+        Token.Semicolon(),
+        Token.Eof(),
+    ]
+
+
+def test_token_equality_and_interning():
+    assert Token.Semicolon() is Token.Semicolon()
+    assert Token.Eof() == Token.Eof() != Token.Illegal()
+    assert Token.Ident("x") == Token.Ident("x")
+    assert Token.Ident("x") != Token.Ident("y")
+    assert Token.Ident("1") != Token.Int("1")
+    assert len({Token.Ident("x"), Token.Ident("x"), Token.Comma()}) == 2
+    assert repr(Token.Int("5")) == "Token.Int('5')" and repr(Token.Eof()) == "Token.Eof"
+
+    assert pickle.loads(pickle.dumps(Token.Eof())) is Token.Eof()
+    assert pickle.loads(pickle.dumps(Token.Ident("x"))) == Token.Ident("x")
+    with pytest.raises(AttributeError):
+        Token.Ident("x").other = 1
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        PROGRAM,
+        "",
+        "   \n\t",
+        "x1 12ab ===!==!!= @#",
+        "fn_ lets iff returned else_ true",
+        "café naïve_x ²3 ٣4 a b   é ",
+        "let x = 1;\x1c\x00 ~",
+    ],
+)
+def test_tokenize_matches_lexer(text):
+    expected = list(Lexer(text))
+    assert list(tokenize(text)) == expected
+
+    compact = tokenize_compact(text)
+    assert len(compact) == len(expected)
+    assert [compact[i] for i in range(len(compact))] == expected
+    assert TOKEN_KINDS[compact.kinds[-1]] == "Eof"
+    for kind, start, end in zip(compact.kinds, compact.starts, compact.ends):
+        if TOKEN_KINDS[kind] in ("Ident", "Int"):
+            assert text[start:end].strip() == text[start:end] != ""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_stream_tokens_across_chunk_boundaries(chunk_size):
+    text = PROGRAM + "café == ²3 != x"
+    expected = list(Lexer(text))
+
+    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+    assert list(tokenize_stream(chunks)) == expected
+    assert list(tokenize_stream(io.StringIO(text), chunk_size)) == expected
+    # bytes chunks split multi-byte characters
+    assert list(tokenize_stream(io.BytesIO(text.encode()), chunk_size)) == expected
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_tokenize_file(tmp_path, use_mmap):
+    path = tmp_path / "program.monkey"
+    path.write_text(PROGRAM * 10)
+    assert list(tokenize_file(path, chunk_size=100, use_mmap=use_mmap)) == list(
+        Lexer(PROGRAM * 10)
+    )
+
+    path.write_text("")
+    assert list(tokenize_file(path, use_mmap=use_mmap)) == [Token.Eof()]
+
+
+@pytest.mark.parametrize(
+    ("offset", "deleted", "inserted"),
+    [
+        (0, 0, "let "),
+        (4, 4, "six"),  # rename an identifier
+        (9, 0, "="),  # "=" becomes "=="
+        (8, 1, ""),  # join two tokens
+        (len(PROGRAM) // 2, 0, "x = 1; y"),
+        (len(PROGRAM), 0, "!"),
+        (0, len(PROGRAM), "fn"),
+    ],
+)
+def test_incremental_edit_matches_full_relex(offset, deleted, inserted):
+    lexer = IncrementalLexer(PROGRAM)
+    old = list(lexer)
+    change = lexer.edit(offset, deleted, inserted)
+
+    text = PROGRAM[:offset] + inserted + PROGRAM[offset + deleted :]
+    expected = tokenize_compact(text)
+    assert lexer.text == text
+    for name in ("kinds", "starts", "ends"):
+        assert np.array_equal(getattr(lexer.tokens, name), getattr(expected, name))
+
+    new = list(lexer)
+    assert new[: change.index] == old[: change.index]
+    assert new[change.index + change.added :] == old[change.index + change.removed :]
+    if deleted < len(PROGRAM):
+        # only the tokens around the edit were re-lexed
+        assert change.removed + change.added <= 8
+
+
+def test_incremental_edit_out_of_range():
+    with pytest.raises(ValueError):
+        IncrementalLexer("let x").edit(3, 5, "")
+
+
+def test_token_spans():
+    lexer = Lexer(PROGRAM, record_spans=True)
+    tokens = list(lexer)
+    compact = tokenize_compact(PROGRAM)
+
+    assert len(lexer.spans) == len(tokens)
+    assert list(lexer.spans) == list(compact.spans())
+    assert list(lexer.spans.starts) == compact.starts.tolist()
+    assert list(lexer.spans.ends) == compact.ends.tolist()
+    # "add" in "let add = fn(x, y) {" on the fourth line
+    assert tokens[11] == Token.Ident("add")
+    start = PROGRAM.index("add")
+    assert lexer.spans[11] == Span(start, start + 3, line=4, column=5)
+    assert lexer.spans[-1] == Span(
+        len(PROGRAM), len(PROGRAM), PROGRAM.count("\n") + 1, 1
+    )
+
+    assert Lexer(PROGRAM).spans is None
+
+
+def test_line_index():
+    lines = LineIndex("ab\n\ncd")
+    assert len(lines) == 3
+    assert [lines.line_column(offset) for offset in range(6)] == [
+        (1, 1),
+        (1, 2),
+        (1, 3),
+        (2, 1),
+        (3, 1),
+        (3, 2),
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2, None])
+def test_lex_batch(tmp_path, workers):
+    sources = [PROGRAM * count for count in range(5)] + ["let é = 1;", ""]
+    paths = []
+    for number, text in enumerate(sources):
+        path = tmp_path / f"{number}.monkey"
+        path.write_text(text, encoding="utf-8")
+        paths.append(path)
+
+    # paths may be given as str as well as any PathLike
+    paths[0] = str(paths[0])
+    results = lex_batch(paths=paths, texts=sources, workers=workers)
+    assert len(results) == 2 * len(sources)
+    for result, text in zip(results, sources + sources):
+        assert result.text == text
+        assert result.to_tokens() == list(Lexer(text))
+
+
+def test_lex_batch_rejects_ambiguous_sources(tmp_path):
+    path = tmp_path / "a.monkey"
+    path.write_text(PROGRAM)
+    with pytest.raises(TypeError):
+        lex_batch([str(path)])
+    with pytest.raises(TypeError):
+        lex_batch(texts=[path])
+    with pytest.raises(TypeError):
+        lex_batch(paths=str(path))
+
+
+def test_lex_batch_cache(tmp_path):
+    cache_dir = tmp_path / "cache"
+    sources = [PROGRAM, PROGRAM, "let x = 1;"]
+
+    first = lex_batch(texts=sources, workers=1, cache_dir=cache_dir)
+    # one entry per distinct text
+    assert len(list(cache_dir.glob("*.npz"))) == 2
+    cached = lex_batch(texts=sources, cache_dir=cache_dir)
+    for result, expected in zip(cached, first):
+        assert result.to_tokens() == expected.to_tokens()
+        assert np.array_equal(result.starts, expected.starts)
+
+    lex_batch(texts=["let y = 2;"], cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.npz"))) == 3
+
+
+@pytest.mark.parametrize("mix", list(benchmark.MIXES))
+def test_synthetic_programs(mix):
+    text = benchmark.create_program(2_000, benchmark.MIXES[mix])
+    assert len(text) == 2_000
+    assert tokenize_compact(text).to_tokens() == list(Lexer(text))
+
+
+def test_benchmark_writes_one_result_per_combination(tmp_path):
+    output = tmp_path / "results.jsonl"
+    benchmark.main(
+        ["--sizes", "500", "--repeat", "1", "--profile", "--output", str(output)]
+    )
+
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(results) == len(benchmark.MIXES) * len(benchmark.ENGINES)
+    assert all(result["tokens_per_second"] > 0 for result in results)
+    for result in results:
+        if result["engine"] == "lexer":
+            assert {
+                "read_char",
+                "peek",
+                "skip_whitespace",
+                "token_construction",
+            } <= set(result["profile"])
+
+
+def test_lex_batch_keeps_carriage_returns(tmp_path):
+    path = tmp_path / "crlf.monkey"
+    path.write_bytes(b"let x = 1;\r\nlet y = 2;\r\n")
+
+    (result,) = lex_batch(paths=[path])
+    expected = tokenize_compact(path.read_bytes().decode())
+    assert result.text == expected.text
+    assert result.starts.tolist() == expected.starts.tolist()
+    assert result.to_tokens() == list(tokenize_file(path))
@@ -1,30 +1,336 @@
+import itertools as it
+import json
+import zipfile
 from collections import Counter
 
+import jsonlines
+import numpy as np
 import pytest
+from blog_post_code.wordle_cliques import benchmark, cliques
 from blog_post_code.wordle_cliques.cliques import (
+    CLIQUES_PATH,
+    anagram_index,
+    disjoint_adjacency,
+    expand_anagrams,
     extract_archive_to_word_list,
+    filter_duplicate_word_sets,
+    filter_words_of_length_n,
+    filter_words_with_duplicate_letters,
     get_unique_set_words_of_length_n,
-    find_all_size_n_cliques
+    load_word_data,
+    read_archive_chunks,
+    read_binary_cliques,
+    find_all_size_n_cliques,
+    unique_letter_words_from_buffer,
+    word_to_mask,
+    words_to_masks,
+    write_cliques,
 )
+from blog_post_code.wordle_cliques.profiling import StageRecorder
+
 
 @pytest.fixture
 def words():
     return extract_archive_to_word_list()
 
+
 @pytest.fixture
 def subset(words):
     return words | get_unique_set_words_of_length_n(5)
 
+
 def test_removal_of_anagrams(subset):
     """Test that at most one word with a given set of letters exists in
     the word list after anagrams are removed."""
     assert max(Counter(map(frozenset, subset)).values()) == 1
 
+
 def test_all_five_cliques_have_no_duplicate_letters(subset):
     assert all(
-        len(set(joined := ''.join(clique))) == len(joined)
+        len(set(joined := "".join(clique))) == len(joined)
         for dct in find_all_size_n_cliques(subset, 5)
         for _, clique in dct.items()
     ), "At least one five clique has a duplicate letter."
-        
 
+
+def test_anagram_expansion(tmp_path, subset):
+    """Expanding the saved cliques gives every combination of anagrams."""
+    anagrams = anagram_index(5, cache_dir=tmp_path)
+    assert [same_letters[0] for same_letters in anagrams.values()] == list(subset)
+
+    with jsonlines.open(CLIQUES_PATH) as reader:
+        saved = [tuple(clique) for dct in reader for clique in dct.values()]
+    expanded = expand_anagrams(
+        ({pos: clique} for pos, clique in enumerate(saved)), anagrams
+    )
+    assert next(expanded) == {0: saved[0]}
+
+    classes = [[anagrams[word_to_mask(word)] for word in clique] for clique in saved]
+    rest = list(expanded)
+    assert len(rest) + 1 == sum(np.prod([len(words) for words in c]) for c in classes)
+    assert all(
+        word in anagrams[word_to_mask(word)]
+        for dct in rest
+        for clique in dct.values()
+        for word in clique
+    )
+    assert len({frozenset(clique) for dct in rest for clique in dct.values()}) == len(
+        rest
+    )
+
+
+@pytest.mark.parametrize("n", [3, 5, 7])
+def test_fused_word_filters_match_pipes(n):
+    """The single pass and vectorized filters keep the words of the chained pipes."""
+    words = list(extract_archive_to_word_list())
+    expected = list(
+        words
+        | filter_words_of_length_n(n)
+        | filter_words_with_duplicate_letters
+        | filter_duplicate_word_sets
+    )
+    assert list(words | get_unique_set_words_of_length_n(n)) == expected
+
+    # small chunks so that many words straddle a chunk boundary
+    vectorized = [
+        word
+        for chunk in read_archive_chunks(chunk_size=1000)
+        for word in unique_letter_words_from_buffer(chunk, n)[0].tolist()
+    ]
+    assert vectorized == [
+        word.encode()
+        for word in words
+        | filter_words_of_length_n(n)
+        | filter_words_with_duplicate_letters
+    ]
+
+
+def test_word_filters_accept_any_characters(tmp_path):
+    """Words with capitals or punctuation are filtered like the chained pipes, or
+    skipped where a letter mask is needed, rather than raising."""
+    mixed = ["Hello", "abcde", "don't", "Abcde", "edcba", "fghij"]
+    expected = ["abcde", "don't", "Abcde", "fghij"]
+    assert list(mixed | get_unique_set_words_of_length_n(5)) == expected
+    assert list(mixed | filter_duplicate_word_sets(anagrams={})) == list(
+        mixed | filter_duplicate_word_sets
+    )
+
+    words, masks = unique_letter_words_from_buffer("\r\n".join(mixed).encode(), 5)
+    assert words.tolist() == [b"abcde", b"edcba", b"fghij"]
+    assert masks.tolist() == list(map(word_to_mask, ["abcde", "edcba", "fghij"]))
+
+    archive = tmp_path / "words.zip"
+    with zipfile.ZipFile(archive, "w") as file:
+        file.writestr("words.txt", "\n".join(mixed))
+    data = load_word_data(5, archive, "words.txt", cache_dir=None)
+    assert data.words == ["abcde", "fghij"]
+
+
+def test_letter_masks():
+    assert word_to_mask("abc") == 0b111
+    assert list(words_to_masks(["fldxt", "zebra"])) == list(
+        map(word_to_mask, ["fldxt", "zebra"])
+    )
+
+
+def test_disjoint_adjacency_matches_set_comparisons(subset):
+    """Compare the blocked mask adjacency against pairwise set.isdisjoint checks."""
+    words = list(subset)[:300]
+    indptr, indices = disjoint_adjacency(words_to_masks(words), block_size=64)
+
+    expected = [
+        (i, j)
+        for (i, left), (j, right) in it.combinations(enumerate(map(set, words)), 2)
+        if left.isdisjoint(right)
+    ]
+    actual = [
+        (i, j) for i in range(len(words)) for j in indices[indptr[i] : indptr[i + 1]]
+    ]
+
+    assert actual == expected
+
+
+def test_bitmask_engine_matches_saved_cliques(subset):
+    """The bitmask search finds exactly the five-cliques saved in cliques.jsonl."""
+    with jsonlines.open(CLIQUES_PATH) as reader:
+        expected = {tuple(clique) for dct in reader for clique in dct.values()}
+
+    found = [
+        clique
+        for dct in find_all_size_n_cliques(subset, 5, engine="bitmask")
+        for clique in dct.values()
+    ]
+
+    assert len(found) == len(expected)
+    assert set(found) == expected
+
+
+@pytest.mark.parametrize(("length", "size"), [(4, 3), (4, 4), (6, 2)])
+def test_bitmask_engine_matches_igraph(words, length, size):
+    subset = list(words | get_unique_set_words_of_length_n(length))[::20]
+
+    def cliques(engine):
+        return {
+            clique
+            for dct in find_all_size_n_cliques(subset, size, engine=engine)
+            for clique in dct.values()
+        }
+
+    assert cliques("bitmask") == cliques("igraph")
+
+
+def test_parallel_bitmask_engine_keeps_order(words):
+    """Splitting the search over processes yields the cliques in the same order."""
+    subset = list(words | get_unique_set_words_of_length_n(4))[::20]
+
+    sequential = list(find_all_size_n_cliques(subset, 3, engine="bitmask"))
+    parallel = list(find_all_size_n_cliques(subset, 3, engine="bitmask", workers=2))
+
+    assert parallel == sequential
+
+
+def test_word_data_cache(tmp_path, words):
+    """A second load comes from the memory-mapped cache and matches the pipeline."""
+    fresh = load_word_data(5, cache_dir=tmp_path)
+    cached = load_word_data(5, cache_dir=tmp_path)
+
+    assert len(list(tmp_path.iterdir())) == 1
+    assert (
+        cached.words == fresh.words == list(words | get_unique_set_words_of_length_n(5))
+    )
+    assert isinstance(cached.indices, np.memmap)
+    assert np.array_equal(cached.indices, fresh.indices)
+    assert cached.anagram_index() == fresh.anagram_index()
+
+    load_word_data(5, remove_anagrams=False, cache_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_written_cliques_expand_anagrams(tmp_path):
+    """The bitmask engine's JSONL output expands anagrams like expand_anagrams."""
+    data = load_word_data(4, cache_dir=tmp_path)
+    anagrams = data.anagram_index()
+    subset = data.words[::20]
+    expected = list(
+        expand_anagrams(find_all_size_n_cliques(subset, 3, engine="bitmask"), anagrams)
+    )
+
+    count = write_cliques(subset, 3, tmp_path / "cliques.jsonl", anagrams=anagrams)
+    with jsonlines.open(tmp_path / "cliques.jsonl") as reader:
+        written = [
+            {int(pos): tuple(clique) for pos, clique in dct.items()} for dct in reader
+        ]
+    assert (
+        count
+        == len(expected)
+        > len(list(find_all_size_n_cliques(subset, 3, "bitmask")))
+    )
+    assert written == expected
+
+
+def test_unwritable_word_data_cache_is_skipped(tmp_path):
+    not_a_dir = tmp_path / "cache"
+    not_a_dir.write_text("")
+    assert (
+        load_word_data(4, cache_dir=not_a_dir).words
+        == load_word_data(4, cache_dir=None).words
+    )
+
+
+def test_interrupted_clique_writing_resumes(tmp_path, monkeypatch, words):
+    """Stop a run part way through, then confirm that resuming from the checkpoint
+    produces exactly the output of an uninterrupted run."""
+    subset = list(words | get_unique_set_words_of_length_n(4))[::20]
+    expected_count = write_cliques(
+        subset, 3, tmp_path / "expected.jsonl", batch_size=100
+    )
+
+    original = cliques.MaskCliqueSearch.search_branch
+    calls = []
+
+    def interrupted(self, branch):
+        calls.append(branch)
+        if len(calls) > 30:
+            raise KeyboardInterrupt
+        return original(self, branch)
+
+    paths = {
+        "cliques_path": tmp_path / "cliques.jsonl",
+        "checkpoint_path": tmp_path / "checkpoint.json",
+        "binary_path": tmp_path / "cliques.bin",
+    }
+    monkeypatch.setattr(cliques.MaskCliqueSearch, "search_branch", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        write_cliques(subset, 3, batch_size=100, **paths)
+    monkeypatch.undo()
+
+    assert 0 < json.loads(paths["checkpoint_path"].read_text())["branches"] <= 30
+    assert write_cliques(subset, 3, batch_size=100, **paths) == expected_count
+    assert (
+        paths["cliques_path"].read_text() == (tmp_path / "expected.jsonl").read_text()
+    )
+
+    with jsonlines.open(paths["cliques_path"]) as reader:
+        written = [tuple(clique) for dct in reader for clique in dct.values()]
+    binary = read_binary_cliques(paths["binary_path"], 3)
+    assert written == [tuple(subset[idx] for idx in row) for row in binary]
+
+    # resuming without the output the checkpoint refers to must not pad it with zeros
+    paths["cliques_path"].unlink()
+    with pytest.raises(ValueError):
+        write_cliques(subset, 3, batch_size=100, **paths)
+    assert not paths["cliques_path"].exists()
+
+
+def test_main_passes_workers_to_the_bitmask_search(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        cliques, "write_cliques", lambda *args, **kwargs: calls.append(kwargs)
+    )
+    cliques.main(
+        cliques_path=tmp_path / "cliques.jsonl",
+        cache_dir=tmp_path,
+        engine="bitmask",
+        workers=3,
+    )
+    assert calls[0]["workers"] == 3
+
+    with pytest.raises(ValueError):
+        cliques.main(
+            cliques_path=tmp_path / "cliques.jsonl", cache_dir=tmp_path, workers=3
+        )
+
+
+@pytest.mark.parametrize("engine", ["igraph", "bitmask"])
+def test_profile_hook_reports_stages(tmp_path, words, engine):
+    stages = StageRecorder()
+    load_word_data(4, cache_dir=tmp_path, profile=stages)
+    names = [stage.name for stage in stages.stages]
+    assert names == ["read", "filter", "adjacency", "cache_write"]
+
+    stages = StageRecorder()
+    subset = load_word_data(4, cache_dir=tmp_path, profile=stages).words[::20]
+    assert [stage.name for stage in stages.stages] == ["cache_load"]
+
+    stages = StageRecorder()
+    found = list(find_all_size_n_cliques(subset, 3, engine=engine, profile=stages))
+    search = stages.stages[-1]
+    assert search.name == "search"
+    assert search.counters["cliques"] == len(found)
+    if engine == "bitmask":
+        assert search.counters["nodes"] >= len(found)
+    else:
+        graph = stages.stages[0].counters
+        assert 0 < graph["density"] < 1 and graph["vertices"] == len(subset)
+
+
+def test_benchmark_writes_one_result_per_combination(tmp_path):
+    output = tmp_path / "results.jsonl"
+    benchmark.main(
+        ["--lengths", "4", "--sizes", "2", "--max-words", "50", "--output", str(output)]
+    )
+
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(results) == len(benchmark.DICTIONARIES) * len(benchmark.DEFAULT_ENGINES)
+    real = [result for result in results if result["dictionary"] == "real"]
+    assert len({result["stages"]["search"]["cliques"] for result in real}) == 1